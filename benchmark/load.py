@@ -0,0 +1,396 @@
+#  Copyright 2025 Exactpro (Exactpro Systems Limited)
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Load test of j-sp HTTP API and engine lifecycle.
+
+Starts server.py against a temporary notebooks/results tree and measures:
+  * execute: `/execute` -> `success` latency for cold (new engine) and warm (reused engine) kernels
+    of `example/example.ipynb`
+  * result: `/result` latency and throughput for JSONL results of configured sizes
+  * listing: `/files/results` and `/files/all` latency for a directory with many files
+  * cleanup: duration of `cleanup_files` for a tree of expired and actual files
+  * users: `/execute` -> `success` latency with N concurrent users
+  * registry: hundreds of concurrent `/execute` of the same notebook by a few users, failed executions
+    and kernels left running over one kernel per user and notebook
+
+Usage: python benchmark/load.py [--scenarios execute,result,listing,cleanup,users,registry]
+                                [--result-sizes 1MB,100MB,1GB] [--listing-files N] [--users N]
+                                [--registry-launches N] [--registry-users N] [--venv DIR] [--report report.json]
+                                [--baseline baseline.json] [--tolerance 0.2]
+
+When a baseline report is passed, durations exceeding the baseline by more than the tolerance are reported
+as regressions and the script exits with non-zero code.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from argparse import ArgumentParser
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from startup import summarize
+
+ROOT_DIR = Path(__file__).absolute().parent.parent
+SCENARIOS = ('execute', 'result', 'listing', 'cleanup', 'users', 'registry')
+SIZE_UNITS = {'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+COPY_RESULT_NOTEBOOK = {
+    'cells': [
+        {'cell_type': 'code', 'execution_count': None, 'id': 'parameters', 'metadata': {'tags': ['parameters']},
+         'outputs': [], 'source': "output_path = 'output.jsonl'\nsource_file = ''"},
+        {'cell_type': 'code', 'execution_count': None, 'id': 'copy', 'metadata': {}, 'outputs': [],
+         'source': 'import shutil\nshutil.copyfile(source_file, output_path)'},
+    ],
+    'metadata': {'kernelspec': {'display_name': 'Python 3', 'language': 'python', 'name': 'python3'},
+                 'language_info': {'name': 'python'}},
+    'nbformat': 4,
+    'nbformat_minor': 5,
+}
+
+
+class Client:
+    def __init__(self, port: int, user_id: str = None):
+        self.base_url = f'http://localhost:{port}'
+        self.headers = {'Cookie': f'engine_user_id={user_id}'} if user_id else {}
+
+    def request(self, method: str, path: str, body=None, timeout: float = 600) -> tuple:
+        data = json.dumps(body).encode() if body is not None else None
+        headers = dict(self.headers, **({'Content-Type': 'application/json'} if data is not None else {}))
+        request = urllib.request.Request(self.base_url + path, data=data, method=method, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as error:
+            return error.code, error.read()
+
+    def execute(self, notebook: Path, parameters: dict, timeout: float) -> dict:
+        start = time.monotonic()
+        status, body = self.request('POST', f'/execute?path={notebook}', parameters)
+        if status != 200:
+            raise RuntimeError(f'/execute responded {status}: {body[:200]}')
+        task_id = json.loads(body)['task_id']
+        while time.monotonic() - start < timeout:
+            status, body = self.request('GET', f'/result?id={task_id}')
+            result = json.loads(body) if status == 200 else {}
+            if result.get('status') == 'success':
+                return {'task_id': task_id, 'latency_sec': time.monotonic() - start, 'result': result}
+            if result.get('status') == 'failed':
+                raise RuntimeError(f'{notebook} execution failed: {result.get("result")}')
+            time.sleep(0.05)
+        raise TimeoutError(f'{notebook} execution is not finished in {timeout} sec')
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().upper()
+    for unit, multiplier in SIZE_UNITS.items():
+        if value.endswith(unit):
+            return int(float(value[:-len(unit)]) * multiplier)
+    return int(value)
+
+
+def prepare_tree(work_dir: Path, venv_dir: Path) -> Path:
+    notebooks_dir = work_dir / 'notebooks'
+    notebooks_dir.mkdir(parents=True)
+    shutil.copy(ROOT_DIR / 'example' / 'example.ipynb', notebooks_dir / 'example.ipynb')
+    (notebooks_dir / 'copy_result.ipynb').write_text(json.dumps(COPY_RESULT_NOTEBOOK))
+    cfg = {
+        'notebooks': str(notebooks_dir),
+        'results': str(work_dir / 'results'),
+        'results-images': str(work_dir / 'results' / 'images'),
+        'logs': str(work_dir / 'logs'),
+        'cleanup-horizon-days': -1,
+        'virtual-environment-dir': str(venv_dir),
+        'python-kernel-name': 'j-sp-benchmark',
+        'max-concurrent-executions': 0,
+        'max-concurrent-executions-per-user': 0,
+    }
+    cfg_path = work_dir / 'custom.json'
+    cfg_path.write_text(json.dumps(cfg))
+    return cfg_path
+
+
+def start_server(cfg_path: Path, port: int, env: dict, log_path: Path, timeout: float) -> subprocess.Popen:
+    log = open(log_path, 'w')
+    process = subprocess.Popen([sys.executable, str(ROOT_DIR / 'server.py'), str(cfg_path), '--port', str(port)],
+                               stdout=log, stderr=subprocess.STDOUT, env=env)
+    start = time.monotonic()
+    while time.monotonic() - start < timeout:
+        try:
+            with urllib.request.urlopen(f'http://localhost:{port}/status', timeout=1):
+                return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError(f'server exited with {process.returncode} code, see {log_path}')
+            time.sleep(0.05)
+    process.terminate()
+    raise TimeoutError(f'server is not started in {timeout} sec')
+
+
+def write_jsonl(path: Path, size: int):
+    line = json.dumps({'int': 123456, 'float': 12.5, 'str': 'x' * 64, 'timestamp': '2024-07-01T05:06:59.664Z'})
+    line = (line + '\n').encode()
+    chunk = line * max(1, (1024 * 1024) // len(line))
+    with open(path, 'wb') as file:
+        written = 0
+        while written < size:
+            data = chunk[:size - written]
+            file.write(data)
+            written += len(data)
+
+
+def bench_execute(port: int, work_dir: Path, runs: int, timeout: float) -> dict:
+    client = Client(port, 'benchmark-execute')
+    notebook = work_dir / 'notebooks' / 'example.ipynb'
+    latencies = [client.execute(notebook, {}, timeout)['latency_sec'] for _ in range(runs + 1)]
+    return {'cold_sec': latencies[0], 'warm_sec': summarize(latencies[1:])}
+
+
+def bench_result(port: int, work_dir: Path, sizes: list, polls: int, timeout: float) -> dict:
+    client = Client(port, 'benchmark-result')
+    notebook = work_dir / 'notebooks' / 'copy_result.ipynb'
+    report = {}
+    for size_arg in sizes:
+        size = parse_size(size_arg)
+        source = work_dir / f'source_{size}.jsonl'
+        write_jsonl(source, size)
+        task_id = client.execute(notebook, {'source_file': {'value': str(source)}}, timeout)['task_id']
+        latencies = []
+        received = 0
+        for _ in range(polls):
+            start = time.monotonic()
+            status, body = client.request('GET', f'/result?id={task_id}')
+            latencies.append(time.monotonic() - start)
+            received += len(body)
+            if status != 200:
+                raise RuntimeError(f'/result responded {status}')
+        report[size_arg] = {
+            'bytes': size,
+            'latency_sec': summarize(latencies),
+            'throughput_mb_sec': received / sum(latencies) / SIZE_UNITS['MB'],
+        }
+        source.unlink()
+    return report
+
+
+def bench_listing(port: int, work_dir: Path, files: int, polls: int) -> dict:
+    client = Client(port)
+    listing_dir = work_dir / 'results' / 'listing'
+    listing_dir.mkdir(parents=True, exist_ok=True)
+    for index in range(files):
+        (listing_dir / f'result_{index:06d}.jsonl').touch()
+    report = {'files': files}
+    for name, path in (('results_dir', f'/files/results?path={listing_dir}'),
+                       ('all_files', f'/files/all?path={listing_dir}')):
+        latencies = []
+        for _ in range(polls):
+            start = time.monotonic()
+            status, _ = client.request('GET', path)
+            latencies.append(time.monotonic() - start)
+            if status != 200:
+                raise RuntimeError(f'{path} responded {status}')
+        report[name] = {'latency_sec': summarize(latencies)}
+    shutil.rmtree(listing_dir)
+    return report
+
+
+def bench_cleanup(work_dir: Path, files: int, env: dict) -> dict:
+    cleanup_dir = work_dir / 'cleanup'
+    expired = (datetime.now() - timedelta(days=30)).timestamp()
+    for index in range(files):
+        sub_dir = cleanup_dir / 'results' / f'run_{index % 100:03d}'
+        sub_dir.mkdir(parents=True, exist_ok=True)
+        path = sub_dir / f'result_{index:06d}.jsonl'
+        path.touch()
+        if index % 2 == 0:
+            os.utime(path, (expired, expired))
+    for name in ('images', 'logs'):
+        (cleanup_dir / name).mkdir(parents=True, exist_ok=True)
+    cfg_path = cleanup_dir / 'custom.json'
+    cfg_path.write_text(json.dumps({
+        'notebooks': str(cleanup_dir / 'notebooks'),
+        'results': str(cleanup_dir / 'results'),
+        'results-images': str(cleanup_dir / 'images'),
+        'logs': str(cleanup_dir / 'logs'),
+        'cleanup-horizon-days': 14,
+        # deletion isn't throttled to measure the janitor itself
+        'cleanup-rate-limit': 0,
+    }))
+    # server module is imported in a separate process to measure the cleanup without running the server
+    script = ('import sys, time, logging; import server; '
+              'logging.disable(logging.INFO); server.read_config(sys.argv[1]); start = time.monotonic(); '
+              'server.cleanup_files(); print(time.monotonic() - start)')
+    output = subprocess.run([sys.executable, '-c', script, str(cfg_path)], cwd=ROOT_DIR, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    remaining = sum(len(files) for _, _, files in os.walk(cleanup_dir / 'results'))
+    shutil.rmtree(cleanup_dir)
+    return {'files': files, 'removed': files - remaining, 'duration_sec': float(output.strip().splitlines()[-1])}
+
+
+def bench_users(port: int, work_dir: Path, users: int, timeout: float) -> dict:
+    notebook = work_dir / 'notebooks' / 'example.ipynb'
+
+    def run(index: int) -> dict:
+        client = Client(port, f'benchmark-user-{index}')
+        cold = client.execute(notebook, {}, timeout)['latency_sec']
+        warm = client.execute(notebook, {}, timeout)['latency_sec']
+        return {'cold_sec': cold, 'warm_sec': warm}
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        results = list(executor.map(run, range(users)))
+    return {
+        'users': users,
+        'wall_sec': time.monotonic() - start,
+        'cold_sec': summarize([r['cold_sec'] for r in results]),
+        'warm_sec': summarize([r['warm_sec'] for r in results]),
+    }
+
+
+def count_child_kernels(pid: int) -> int:
+    kernels = 0
+    for proc_dir in Path('/proc').iterdir():
+        if not proc_dir.name.isdigit():
+            continue
+        try:
+            # parent pid is the 4th field after the command name in parentheses
+            parent_pid = int((proc_dir / 'stat').read_text().rsplit(')', 1)[1].split()[1])
+            cmdline = (proc_dir / 'cmdline').read_bytes()
+        except (OSError, IndexError, ValueError):
+            continue
+        if parent_pid == pid and b'ipykernel_launcher' in cmdline:
+            kernels += 1
+    return kernels
+
+
+def bench_registry(port: int, work_dir: Path, server_pid: int, launches: int, users: int, timeout: float) -> dict:
+    notebook = work_dir / 'notebooks' / 'example.ipynb'
+    kernels_before = count_child_kernels(server_pid)
+
+    def run(index: int) -> bool:
+        # launches of the same user and notebook race for the same engine
+        client = Client(port, f'benchmark-registry-{index % users}')
+        try:
+            client.execute(notebook, {}, timeout)
+            return True
+        except RuntimeError:
+            return False
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=launches) as executor:
+        succeeded = sum(executor.map(run, range(launches)))
+    wall_sec = time.monotonic() - start
+    kernels = count_child_kernels(server_pid) - kernels_before
+    return {
+        'launches': launches,
+        'users': users,
+        'failed': launches - succeeded,
+        'kernels': kernels,
+        'leaked_kernels': max(kernels - users, 0),
+        'wall_sec': wall_sec,
+    }
+
+
+def find_regressions(report: dict, baseline: dict, tolerance: float, path: str = '') -> list:
+    regressions = []
+    for key, value in report.items():
+        key_path = f'{path}.{key}' if path else key
+        baseline_value = baseline.get(key) if isinstance(baseline, dict) else None
+        if isinstance(value, dict):
+            regressions.extend(find_regressions(value, baseline_value or {}, tolerance, key_path))
+        elif (isinstance(value, float) and isinstance(baseline_value, (int, float)) and baseline_value > 0
+              and key in ('median', 'cold_sec', 'wall_sec', 'duration_sec')
+              and value > baseline_value * (1 + tolerance)):
+            regressions.append({'metric': key_path, 'baseline': baseline_value, 'actual': value})
+    return regressions
+
+
+def main():
+    parser = ArgumentParser(description='j-sp HTTP API and engine lifecycle load test')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma separated scenarios to run')
+    parser.add_argument('--port', type=int, default=18081)
+    parser.add_argument('--runs', type=int, default=5, help='number of warm executions')
+    parser.add_argument('--result-sizes', default='1MB,100MB', help='comma separated result sizes, e.g. 1MB,100MB,1GB')
+    parser.add_argument('--polls', type=int, default=5, help='number of requests per measurement')
+    parser.add_argument('--listing-files', type=int, default=10000)
+    parser.add_argument('--cleanup-files', type=int, default=10000)
+    parser.add_argument('--users', type=int, default=8, help='number of concurrent users')
+    parser.add_argument('--registry-launches', type=int, default=200, help='number of concurrent launches')
+    parser.add_argument('--registry-users', type=int, default=4, help='number of users sharing the launches')
+    parser.add_argument('--timeout', type=float, default=600)
+    parser.add_argument('--venv', help='existing virtual environment, a new one is created by default')
+    parser.add_argument('--report', help='path to JSON report, stdout by default')
+    parser.add_argument('--baseline', help='path to JSON report to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative slowdown against the baseline')
+    args = parser.parse_args()
+    scenarios = [scenario.strip() for scenario in args.scenarios.split(',') if scenario.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f'unknown scenarios: {unknown}')
+
+    report = {'benchmark': 'load', 'started': datetime.now().isoformat(), 'python': sys.version.split()[0]}
+    with tempfile.TemporaryDirectory(prefix='j-sp-load-') as tmp:
+        work_dir = Path(tmp)
+        venv_dir = Path(args.venv) if args.venv else work_dir / 'venv'
+        cfg_path = prepare_tree(work_dir, venv_dir)
+        env = dict(os.environ, JUPYTER_DATA_DIR=str(work_dir / 'jupyter'), PYTHONUNBUFFERED='1')
+
+        if 'cleanup' in scenarios:
+            report['cleanup'] = bench_cleanup(work_dir, args.cleanup_files, env)
+
+        server_scenarios = [scenario for scenario in scenarios if scenario != 'cleanup']
+        if server_scenarios:
+            process = start_server(cfg_path, args.port, env, work_dir / 'server.log', args.timeout)
+            try:
+                if 'execute' in scenarios:
+                    report['execute'] = bench_execute(args.port, work_dir, args.runs, args.timeout)
+                if 'result' in scenarios:
+                    report['result'] = bench_result(args.port, work_dir, args.result_sizes.split(','), args.polls,
+                                                    args.timeout)
+                if 'listing' in scenarios:
+                    report['listing'] = bench_listing(args.port, work_dir, args.listing_files, args.polls)
+                if 'users' in scenarios:
+                    report['users'] = bench_users(args.port, work_dir, args.users, args.timeout)
+                if 'registry' in scenarios:
+                    report['registry'] = bench_registry(args.port, work_dir, process.pid, args.registry_launches,
+                                                        args.registry_users, args.timeout)
+            except Exception:
+                sys.stderr.write((work_dir / 'server.log').read_text()[-5000:])
+                raise
+            finally:
+                process.terminate()
+                process.wait()
+
+    if args.baseline:
+        report['regressions'] = find_regressions(report, json.loads(Path(args.baseline).read_text()), args.tolerance)
+
+    output = json.dumps(report, indent=2)
+    if args.report:
+        Path(args.report).write_text(output)
+    else:
+        print(output)
+    if report.get('regressions'):
+        sys.exit(f'{len(report["regressions"])} regressions found')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#  Copyright 2025 Exactpro (Exactpro Systems Limited)
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Measures j-sp startup time: how long it takes until `/status` responds
+and until the python kernel is registered.
+
+The first run registers the kernel from scratch (cold), the next runs reuse the registered kernel (warm).
+
+Usage: python benchmark/startup.py [--runs N] [--port PORT] [--report report.json]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from argparse import ArgumentParser
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).absolute().parent.parent
+KERNEL_READY_MARKERS = ("created '", "reuse '")
+
+
+def prepare_config(work_dir: Path, venv_dir: Path) -> Path:
+    cfg = {
+        'notebooks': str(work_dir / 'notebooks'),
+        'results': str(work_dir / 'results'),
+        'results-images': str(work_dir / 'results' / 'images'),
+        'logs': str(work_dir / 'logs'),
+        'cleanup-horizon-days': -1,
+        'virtual-environment-dir': str(venv_dir),
+        'python-kernel-name': 'j-sp-benchmark',
+    }
+    cfg_path = work_dir / 'custom.json'
+    cfg_path.write_text(json.dumps(cfg))
+    return cfg_path
+
+
+def measure_startup(cfg_path: Path, port: int, env: dict, timeout: float) -> dict:
+    start = time.monotonic()
+    process = subprocess.Popen([sys.executable, str(ROOT_DIR / 'server.py'), str(cfg_path), '--port', str(port)],
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, env=env)
+    kernel_ready = threading.Event()
+    result = {}
+
+    def read_output():
+        for line in process.stdout:
+            if not kernel_ready.is_set() and 'kernel' in line and any(m in line for m in KERNEL_READY_MARKERS):
+                result['kernel_ready_sec'] = time.monotonic() - start
+                kernel_ready.set()
+
+    reader = threading.Thread(target=read_output, daemon=True)
+    reader.start()
+    try:
+        while time.monotonic() - start < timeout:
+            try:
+                with urllib.request.urlopen(f'http://localhost:{port}/status', timeout=1) as response:
+                    if response.status == 200:
+                        result['status_ready_sec'] = time.monotonic() - start
+                        break
+            except OSError:
+                time.sleep(0.01)
+        kernel_ready.wait(max(0.0, timeout - (time.monotonic() - start)))
+    finally:
+        process.terminate()
+        process.wait()
+    return result
+
+
+def summarize(values: list) -> dict:
+    if not values:
+        return {}
+    return {'min': min(values), 'median': statistics.median(values), 'max': max(values)}
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--timeout', type=float, default=300)
+    parser.add_argument('--venv', help='existing virtual environment, a new one is created by default')
+    parser.add_argument('--report', help='path to JSON report, stdout by default')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='j-sp-startup-') as tmp:
+        work_dir = Path(tmp)
+        venv_dir = Path(args.venv) if args.venv else work_dir / 'venv'
+        cfg_path = prepare_config(work_dir, venv_dir)
+        env = dict(os.environ, JUPYTER_DATA_DIR=str(work_dir / 'jupyter'), PYTHONUNBUFFERED='1')
+
+        runs = [measure_startup(cfg_path, args.port, env, args.timeout) for _ in range(args.runs)]
+
+    report = {
+        'benchmark': 'startup',
+        'runs': runs,
+        'cold': runs[0] if runs else {},
+        'warm': {
+            'status_ready_sec': summarize([r['status_ready_sec'] for r in runs[1:] if 'status_ready_sec' in r]),
+            'kernel_ready_sec': summarize([r['kernel_ready_sec'] for r in runs[1:] if 'kernel_ready_sec' in r]),
+        },
+    }
+    output = json.dumps(report, indent=2)
+    if args.report:
+        Path(args.report).write_text(output)
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,197 @@
+#  Copyright 2025 Exactpro (Exactpro Systems Limited)
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Compares parameters cell parsing of CustomPythonTranslator with the previous regex based implementation.
+
+The equivalence check parses a fixed corpus and randomly generated parameters cells by both implementations
+and fails on the first difference. The micro-benchmark measures parsing time of typical and long definitions.
+
+Usage: python benchmark/translator.py [--cases N] [--seed SEED] [--repeat N] [--report report.json]
+"""
+
+import json
+import logging
+import random
+import re
+import sys
+import timeit
+from argparse import ArgumentParser
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).absolute().parent.parent))
+
+from papermill.models import Parameter
+
+from json_stream_provider.custom_python_translator import CustomPythonTranslator
+
+REGEX_PARAMETER_PATTERN = re.compile(
+    r"^(?P<target>\w[\w_]*)\s*(:\s*[\"']?(?P<annotation>\w[\w_\[\],\s]*)[\"']?\s*)?=\s*(?P<value>(\"\"\"(?:\\.|[^\\])*?\"\"\"|\'\'\'(?:\\.|[^\\])*?\'\'\'|\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'|[^\#]*?))(\s*#\s*(type:\s*(?P<type_comment>[^\s]*)\s*)?(?P<help>.*))?$"
+)
+
+CORPUS = [
+    'a = 1',
+    'a: int = 1',
+    'a: "int" = 1  # help',
+    "a: 'List[str]' = ['x', 'y']  # type: list help text",
+    'a = 1 # type: int',
+    'a = 1 #type:int   help',
+    'a = "x # not a comment"',
+    'a = "x # not a comment" # comment',
+    "a = 'it\\'s' # escaped quote",
+    'a = "unterminated # comment',
+    'a = """multi\nline""" # help',
+    "a = '''x''' + '''y'''",
+    'a = """x""" y # help',
+    'a = {\n  "k": 1,  # ignored comment\n  "v": 2\n} # help',
+    'a = [1,\n 2]\nb = 3',
+    'a == 1',
+    'a = b = 1',
+    '# comment only\n\nx = None',
+    'print(1)',
+    'x: Optional[str] = None',
+    'x : Dict[str, int] = {}  #  type:   Dict   the dict',
+    'x = "a\\\\" # trailing backslash escaped',
+    'x = "a\\',
+    'x = #',
+    'x = 1 #',
+    'x_pycode = "import os\\nprint(os.getcwd())  # inner"  # code',
+    'x_file = "/home/jupyter-notebook/file.jsonl"',
+    'x_timestamp = "2024-07-01T05:06:59.664Z"',
+    'ÿ = 1',
+    'x = \'\'\'a\\\'\'\'b\'\'\'',
+    'x = """a""" """b""" # c',
+]
+
+FRAGMENTS = ['a', 'b1', '_x', 'value_pycode', ' ', '  ', ':', '=', '==', '#', '# help', 'type:', 'type: int', 'int',
+             'List[str]', '"', "'", '"""', "'''", '\\', '\\"', "\\'", 'x # y', '[', ']', '{', '}', ',', '1', '-2.5',
+             'None', 'True', '\n', '\n\n', '\n# comment\n', 'é', '\t']
+
+
+def inspect_with_regex(source: str):
+    """The previous implementation of CustomPythonTranslator.inspect"""
+    logger = CustomPythonTranslator.logger
+    params = []
+
+    def flatten_accumulator(accumulator):
+        flat_string = ""
+        for line in accumulator[:-1]:
+            if "#" in line:
+                comment_pos = line.index("#")
+                flat_string += line[:comment_pos].strip()
+            else:
+                flat_string += line.strip()
+        if len(accumulator):
+            flat_string += accumulator[-1].strip()
+        return flat_string
+
+    grouped_variable = []
+    accumulator = []
+    for line in source.splitlines():
+        if len(line.strip()) == 0 or line.strip().startswith('#'):
+            continue
+        if line.count("=") > 0:
+            grouped_variable.append(flatten_accumulator(accumulator))
+            accumulator = []
+        accumulator.append(line)
+    grouped_variable.append(flatten_accumulator(accumulator))
+
+    for definition in grouped_variable:
+        if len(definition) == 0:
+            continue
+        match = re.match(REGEX_PARAMETER_PATTERN, definition)
+        if match is not None:
+            attr = match.groupdict()
+            type_name = str(attr["annotation"] or attr["type_comment"] or None)
+            parameter = Parameter(name=attr["target"].strip(), inferred_type_name=type_name.strip(),
+                                  default=str(attr["value"]).strip(), help=str(attr["help"] or "").strip(), )
+            params.append(parameter)
+            logger.debug("The %s parameter is parsed from %s definition", parameter, definition)
+        else:
+            logger.debug("The %s definition isn't matched to the expression pattern", definition)
+    return params
+
+
+def inspect(source: str):
+    return CustomPythonTranslator.inspect({'source': source})
+
+
+def generate_source(rnd: random.Random) -> str:
+    lines = []
+    for _ in range(rnd.randint(1, 4)):
+        line = rnd.choice(['a', 'x_pycode', 'n']) + rnd.choice(['', ' ', ': int', ": 'str'", ': List[int] '])
+        line += rnd.choice(['=', ' = ', ' =  '])
+        line += ''.join(rnd.choice(FRAGMENTS) for _ in range(rnd.randint(0, 8)))
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def check_equivalence(cases: int, seed: int) -> int:
+    rnd = random.Random(seed)
+    sources = CORPUS + [generate_source(rnd) for _ in range(cases)]
+    for source in sources:
+        expected = inspect_with_regex(source)
+        actual = inspect(source)
+        if expected != actual:
+            print(f'difference for {source!r}:\n  regex:  {expected}\n  parser: {actual}')
+            sys.exit(1)
+    return len(sources)
+
+
+def measure(repeat: int) -> dict:
+    long_code = 'import os\\n' + 'print(os.getcwd())  # line\\n' * 200
+    sources = {
+        'typical': '\n'.join([
+            'output_path = ""',
+            'customization_path: str = ""  # path to customization',
+            'limit: int = 100  # type: int rows limit',
+            'start_timestamp = "2024-07-01T05:06:59.664Z"',
+            'ids = [1, 2,\n 3, 4]',
+        ]),
+        'long_pycode': f'filter_pycode = "{long_code}"  # filter code',
+        'long_unquoted': 'value = ' + ' + '.join(['1'] * 2000) + '  # sum',
+        'unterminated_pycode': 'filter_pycode = """' + 'print(1)  # line\\n' * 300,
+        'escaped_pycode_expression': 'filter_pycode = "' + '\\" ' * 2000 + '" + suffix  # filter code',
+    }
+    report = {}
+    for name, source in sources.items():
+        regex_time = min(timeit.repeat(lambda: inspect_with_regex(source), number=repeat, repeat=3)) / repeat
+        parser_time = min(timeit.repeat(lambda: inspect(source), number=repeat, repeat=3)) / repeat
+        report[name] = {'regex_us': regex_time * 1e6, 'parser_us': parser_time * 1e6,
+                        'speedup': regex_time / parser_time if parser_time else None}
+        print(f'{name}: regex {regex_time * 1e6:.1f} us, parser {parser_time * 1e6:.1f} us, '
+              f'speedup x{report[name]["speedup"]:.1f}')
+    return report
+
+
+def main():
+    parser = ArgumentParser(description='Parameters cell parser equivalence check and micro-benchmark')
+    parser.add_argument('--cases', type=int, default=20000, help='number of generated parameters cells')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=200, help='number of parsing per measurement')
+    parser.add_argument('--report', help='path to JSON report')
+    args = parser.parse_args()
+
+    CustomPythonTranslator.create_logger()
+    logging.getLogger('translator').setLevel(logging.WARNING)
+
+    checked = check_equivalence(args.cases, args.seed)
+    print(f'{checked} parameters cells are parsed equally')
+    report = {'equivalent_cells': checked, 'timings': measure(args.repeat)}
+    if args.report:
+        Path(args.report).write_text(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
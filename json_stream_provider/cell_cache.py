@@ -0,0 +1,128 @@
+#  Copyright 2025 Exactpro (Exactpro Systems Limited)
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import ast
+import hashlib
+import logging
+from typing import Dict, FrozenSet, Optional, Set
+
+from IPython.core.inputtransformer2 import TransformerManager
+
+CACHEABLE_CELL_TAG = 'cacheable'
+PARAMETERS_CELL_TAGS = ('parameters', 'injected-parameters')
+
+logger: logging.Logger = logging.getLogger('engine')
+
+_transformer_manager = TransformerManager()
+
+
+def compute_cell_cache_keys(nb) -> Dict[str, str]:
+    """
+    Computes cache keys of code cells tagged `cacheable`.
+
+    The key covers the cell source and everything the cell depends on: assignments of parameters
+    and sources of the upstream cells defining names used by the cell.
+    A cell isn't cacheable when a downstream cell rebinds a name defined by it.
+
+    Returns:
+        Dict[str, str]: cache key by cell id
+    """
+    derived: Dict[str, FrozenSet[str]] = {}
+    opaque: Set[str] = set()
+    candidates: Dict[str, tuple] = {}
+    keys: Dict[str, str] = {}
+    for index, cell in enumerate(nb.cells):
+        if cell.cell_type != 'code' or not cell.source.strip():
+            continue
+        cell_id = get_cell_id(cell, index)
+        tags = cell.metadata.get('tags', [])
+        tree = _parse(cell.source)
+        if tree is None:
+            # dependencies of the cell are unknown, so all downstream cells depend on its source
+            opaque.add(_hash(cell.source))
+            continue
+
+        stored = _stored_names(tree)
+        for candidate_id, (_, candidate_stored) in list(candidates.items()):
+            if stored & candidate_stored:
+                logger.debug("%s cell isn't cached because %s names are rebound by %s cell",
+                             candidate_id, stored & candidate_stored, cell_id)
+                del candidates[candidate_id]
+
+        if any(tag in PARAMETERS_CELL_TAGS for tag in tags):
+            for statement in tree.body:
+                token = _hash(ast.dump(statement))
+                for name in _stored_names(statement):
+                    derived[name] = frozenset({token})
+            continue
+
+        tokens = {_hash(cell.source), *opaque}
+        for name in _loaded_names(tree):
+            tokens.update(derived.get(name, ()))
+        tokens = frozenset(tokens)
+        for name in stored:
+            derived[name] = tokens
+
+        if CACHEABLE_CELL_TAG in tags:
+            candidates[cell_id] = (_hash('\n'.join(sorted(tokens))), stored)
+
+    for cell_id, (key, _) in candidates.items():
+        keys[cell_id] = key
+    return keys
+
+
+def get_cell_id(cell, index: int) -> str:
+    return cell.get('id') or str(index)
+
+
+def get_stored_names(nb, cell_ids) -> Set[str]:
+    """Returns names defined by the code cells with the ids"""
+    names = set()
+    for index, cell in enumerate(nb.cells):
+        if cell.cell_type != 'code' or get_cell_id(cell, index) not in cell_ids:
+            continue
+        tree = _parse(cell.source)
+        if tree is not None:
+            names.update(_stored_names(tree))
+    return names
+
+
+def _parse(source: str) -> Optional[ast.Module]:
+    try:
+        return ast.parse(_transformer_manager.transform_cell(source))
+    except SyntaxError:
+        return None
+
+
+def _stored_names(tree: ast.AST) -> Set[str]:
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and isinstance(node.ctx, (ast.Store, ast.Del)):
+            names.add(node.id)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            names.add(node.name)
+        elif isinstance(node, (ast.Import, ast.ImportFrom)):
+            for alias in node.names:
+                names.add(alias.asname or alias.name.split('.')[0])
+        elif isinstance(node, (ast.Global, ast.Nonlocal)):
+            names.update(node.names)
+    return names
+
+
+def _loaded_names(tree: ast.AST) -> Set[str]:
+    return {node.id for node in ast.walk(tree) if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)}
+
+
+def _hash(value: str) -> str:
+    return hashlib.sha256(value.encode()).hexdigest()
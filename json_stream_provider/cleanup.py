@@ -0,0 +1,264 @@
+#  Copyright 2025 Exactpro (Exactpro Systems Limited)
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+logger: logging.Logger = logging.getLogger('j-sp')
+
+# empty directory is removed when it isn't modified for this time, so directories of starting runs are kept
+MIN_EMPTY_DIR_AGE_SEC = 60 * 60
+
+
+class CleanupTarget:
+    """
+    Directory to clean: files modified before the horizon are removed, then the oldest files are removed
+    until total size fits into the quota.
+    """
+
+    def __init__(self, directory: str, horizon: Optional[float] = None, quota: int = 0):
+        self.directory = os.path.abspath(directory)
+        # unix time, None disables removal by age
+        self.horizon = horizon
+        # bytes, zero or negative value disables the quota
+        self.quota = quota
+
+
+class CleanupReport:
+    def __init__(self, directory: str, dry_run: bool):
+        self.directory = directory
+        self.dry_run = dry_run
+        self.scanned_files = 0
+        self.scanned_bytes = 0
+        self.expired_files = 0
+        self.expired_bytes = 0
+        self.evicted_files = 0
+        self.evicted_bytes = 0
+        self.removed_dirs = 0
+        self.errors = 0
+        self.duration = 0.0
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+    def __str__(self):
+        return (f"{'dry run ' if self.dry_run else ''}cleanup of '{self.directory}': "
+                f"scanned {self.scanned_files} files ({self.scanned_bytes} bytes), "
+                f"removed {self.expired_files} expired files ({self.expired_bytes} bytes), "
+                f"{self.evicted_files} files over quota ({self.evicted_bytes} bytes), "
+                f"{self.removed_dirs} empty directories, {self.errors} errors in {self.duration:.3f} sec")
+
+
+class _RateLimiter:
+    """Token bucket shared by deleting threads, limits number of file system operations per second"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self._tokens = rate
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+
+
+class _Inode:
+    """Hard links of the same file are removed together, their space is freed when the last link is removed"""
+    __slots__ = ('paths', 'size', 'mtime')
+
+    def __init__(self, size: int, mtime: float):
+        self.paths: List[str] = []
+        self.size = size
+        self.mtime = mtime
+
+
+class CleanupEngine:
+    """
+    Removes expired and over quota files. Directories are scanned by `os.scandir` in worker threads,
+    files are removed in parallel batches limited by rate, empty directories are pruned.
+    One summary is logged for each directory per pass.
+    """
+
+    def __init__(self, workers: int = 4, rate_limit: float = 1000, batch_size: int = 256, dry_run: bool = False):
+        self.workers = workers
+        self.rate_limit = rate_limit
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+
+    def configure(self, workers: int, rate_limit: float, dry_run: bool):
+        self.workers = max(workers, 1)
+        self.rate_limit = rate_limit
+        self.dry_run = dry_run
+
+    def run(self, targets: List[CleanupTarget], protected: Iterable[str] = ()) -> List[CleanupReport]:
+        """
+        Cleans the directories, nested target directories are cleaned by their own targets only.
+        Protected files are never removed.
+        """
+        protected = {os.path.abspath(path) for path in protected if path}
+        excluded = {target.directory for target in targets}
+        reports = []
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='cleanup') as executor:
+            limiter = _RateLimiter(self.rate_limit)
+            for target in targets:
+                if not os.path.isdir(target.directory):
+                    logger.warning('%s is not a valid directory for cleanup files', target.directory)
+                    continue
+                report = self._clean(executor, limiter, target, excluded - {target.directory}, protected)
+                logger.info('%s', report)
+                reports.append(report)
+        return reports
+
+    def _clean(self, executor: ThreadPoolExecutor, limiter: _RateLimiter, target: CleanupTarget,
+               excluded: Set[str], protected: Set[str]) -> CleanupReport:
+        start = time.monotonic()
+        report = CleanupReport(target.directory, self.dry_run)
+        inodes, dirs = self._scan(executor, target.directory, excluded, protected, report)
+
+        victims: List[_Inode] = []
+        kept: List[_Inode] = []
+        for inode in inodes.values():
+            report.scanned_bytes += inode.size
+            if target.horizon is not None and inode.mtime < target.horizon:
+                victims.append(inode)
+                report.expired_files += len(inode.paths)
+                report.expired_bytes += inode.size
+            else:
+                kept.append(inode)
+        if target.quota > 0:
+            used = sum(inode.size for inode in kept)
+            if used > target.quota:
+                kept.sort(key=lambda item: item.mtime)
+                for inode in kept:
+                    if used <= target.quota:
+                        break
+                    victims.append(inode)
+                    used -= inode.size
+                    report.evicted_files += len(inode.paths)
+                    report.evicted_bytes += inode.size
+
+        if not self.dry_run:
+            paths = [path for inode in victims for path in inode.paths]
+            batches = [paths[i:i + self.batch_size] for i in range(0, len(paths), self.batch_size)]
+            for future in wait([executor.submit(_remove_files, batch, limiter) for batch in batches]).done:
+                report.errors += future.result()
+            report.removed_dirs = self._prune(dirs, limiter)
+        report.duration = time.monotonic() - start
+        return report
+
+    def _scan(self, executor: ThreadPoolExecutor, directory: str, excluded: Set[str], protected: Set[str],
+              report: CleanupReport) -> Tuple[Dict[Tuple[int, int], _Inode], List[Tuple[str, float]]]:
+        inodes: Dict[Tuple[int, int], _Inode] = {}
+        dirs: List[Tuple[str, float]] = []
+        pending = {executor.submit(_scan_dir, directory)}
+        while pending:
+            done, pending = wait(pending, return_when='FIRST_COMPLETED')
+            for future in done:
+                files, sub_dirs, errors = future.result()
+                report.errors += errors
+                for path, stat in files:
+                    if path in protected:
+                        continue
+                    report.scanned_files += 1
+                    key = (stat.st_dev, stat.st_ino)
+                    inode = inodes.get(key)
+                    if inode is None:
+                        inode = inodes[key] = _Inode(stat.st_size, stat.st_mtime)
+                    inode.paths.append(path)
+                for path, mtime in sub_dirs:
+                    if path in excluded:
+                        continue
+                    dirs.append((path, mtime))
+                    pending.add(executor.submit(_scan_dir, path))
+        return inodes, dirs
+
+    @staticmethod
+    def _prune(dirs: List[Tuple[str, float]], limiter: _RateLimiter) -> int:
+        # modification time is taken by the scan, because removal of files updates it
+        dead_line = time.time() - MIN_EMPTY_DIR_AGE_SEC
+        removed = 0
+        # nested directories are removed before their parents
+        for path, mtime in sorted(dirs, key=lambda item: item[0].count(os.sep), reverse=True):
+            if mtime >= dead_line or not _is_empty(path):
+                continue
+            limiter.acquire()
+            try:
+                os.rmdir(path)
+                removed += 1
+            except OSError:
+                # the directory is removed or filled concurrently
+                pass
+        return removed
+
+
+def _scan_dir(directory: str) -> Tuple[List[Tuple[str, os.stat_result]], List[Tuple[str, float]], int]:
+    files = []
+    dirs = []
+    errors = 0
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs.append((entry.path, entry.stat(follow_symlinks=False).st_mtime))
+                    elif entry.is_file(follow_symlinks=False):
+                        files.append((entry.path, entry.stat(follow_symlinks=False)))
+                except FileNotFoundError:
+                    continue
+                except OSError as error:
+                    logger.debug("'%s' isn't scanned: %s", entry.path, error)
+                    errors += 1
+    except FileNotFoundError:
+        pass
+    except OSError as error:
+        logger.debug("'%s' directory isn't scanned: %s", directory, error)
+        errors += 1
+    return files, dirs, errors
+
+
+def _remove_files(paths: List[str], limiter: _RateLimiter) -> int:
+    errors = 0
+    for path in paths:
+        limiter.acquire()
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        except OSError as error:
+            logger.debug("'%s' file isn't removed: %s", path, error)
+            errors += 1
+    return errors
+
+
+def _is_empty(path: str) -> bool:
+    try:
+        with os.scandir(path) as entries:
+            return next(entries, None) is None
+    except OSError:
+        return False
@@ -12,17 +12,61 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import asyncio
+import copy
 import logging
+import os
 import time
+from contextlib import asynccontextmanager
 from datetime import datetime
+from queue import Empty
+from typing import AsyncIterator, Callable, Dict, Iterable, List, Optional
 
-from nbclient.exceptions import DeadKernelError
+from jupyter_core.utils import ensure_async
+from nbclient.exceptions import CellTimeoutError, DeadKernelError
 from papermill.clientwrap import PapermillNotebookClient
 from papermill.engines import NBClientEngine, NotebookExecutionManager, PapermillEngines
 from papermill.utils import remove_args, merge_kwargs, logger
 
+from json_stream_provider.cell_cache import compute_cell_cache_keys, get_cell_id, get_stored_names
+from json_stream_provider.kernel_pool import KernelPool, execute_silently
+from json_stream_provider.result_channel import COMM_TARGET_NAME, KERNEL_MODULES_DIR, ResultChannel
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
 DEFAULT_ENGINE_USER_ID = 'default_engine_user_id'
 
+# deletes variables of the previous execution from user namespace of the kernel. Modules and objects imported
+# from modules are kept, so imports stay warm. Output history is dropped because it references results of cells.
+RESET_NAMESPACE_CODE = """
+def __jsp_reset(preserved):
+    import gc, sys, types
+    shell = get_ipython()
+    for name in list(shell.user_ns):
+        value = shell.user_ns[name]
+        if (name.startswith('_') or name in shell.user_ns_hidden or name in preserved
+                or isinstance(value, types.ModuleType)):
+            continue
+        if (isinstance(value, (type, types.FunctionType, types.BuiltinFunctionType))
+                and getattr(value, '__module__', '__main__') != '__main__'):
+            continue
+        del shell.user_ns[name]
+    shell.displayhook.flush()
+    sys.last_type = sys.last_value = sys.last_traceback = None
+    gc.collect()
+    try:
+        # freed heap is returned to the system, so resident memory reflects live objects
+        import ctypes
+        ctypes.CDLL('libc.so.6').malloc_trim(0)
+    except (OSError, AttributeError):
+        pass
+__jsp_reset(%r)
+del __jsp_reset
+"""
+
 
 class EngineKey:
     def __init__(self, user_id, notebook_file):
@@ -45,21 +89,130 @@ class EngineKey:
         return f"{self.user_id}:{self.notebook_file}"
 
 
+class CustomNotebookClient(PapermillNotebookClient):
+    """
+    Papermill notebook client which skips cacheable cells already executed by the kernel with the same cache key.
+    Outputs of the skipped cell are restored from the previous execution.
+    """
+
+    def __init__(self, nb_man, km=None, raise_on_iopub_timeout=True, kernel_cwd=None,
+                 result_channel: ResultChannel = None, **kw):
+        super().__init__(nb_man, km=km, raise_on_iopub_timeout=raise_on_iopub_timeout, **kw)
+        # cell id -> (cache key, outputs) of the last execution in the kernel
+        self.cell_cache: dict = {}
+        self.cell_cache_keys: dict = {}
+        # working directory of the kernel taken from the pool, such kernel is started in another directory
+        self.kernel_cwd = kernel_cwd
+        self.result_channel = result_channel if result_channel is not None and result_channel.is_enabled() else None
+        # comm id -> path of the result which is being received
+        self.result_comms: dict = {}
+        if self.result_channel is not None:
+            self.comm_open_handlers[COMM_TARGET_NAME] = self.on_comm_open_result
+
+    async def async_start_new_kernel_client(self):
+        kc = await super().async_start_new_kernel_client()
+        await self.async_prepare_kernel()
+        return kc
+
+    async def async_prepare_kernel(self):
+        """Sets up started or restarted kernel: working directory, modules and variables provided by j-sp"""
+        code = [f'__sys.path.append({KERNEL_MODULES_DIR!r}) if {KERNEL_MODULES_DIR!r} not in __sys.path else None']
+        if self.kernel_cwd is not None:
+            code.append(f'__os.chdir({self.kernel_cwd!r})')
+        if self.result_channel is not None:
+            code.append(f'__os.environ["JSP_RESULT_CHANNEL"] = {self.result_channel.results_dir!r}')
+        await execute_silently(self.kc, '; '.join(['import os as __os, sys as __sys', *code, 'del __os, __sys']),
+                               self.startup_timeout)
+
+    def on_comm_open_result(self, msg):
+        path = msg['content']['data'].get('path')
+        if not path or not self.result_channel.accepts(path):
+            self.log.warning("Result channel doesn't accept '%s' path", path)
+            return None
+        comm_id = msg['content']['comm_id']
+        self.result_channel.open(path)
+        self.result_comms[comm_id] = path
+        return _ResultComm(self, comm_id, path)
+
+    def close_result(self, comm_id: str):
+        path = self.result_comms.pop(comm_id, None)
+        if path is not None:
+            self.result_channel.close(path)
+        # nbclient doesn't forget comm objects by comm_close message
+        self.comm_objects.pop(comm_id, None)
+
+    def close_results(self):
+        for comm_id in list(self.result_comms):
+            self.close_result(comm_id)
+
+    async def async_execute_cell(self, cell, cell_index, execution_count=None, store_history=True):
+        cell_id = get_cell_id(cell, cell_index)
+        key = self.cell_cache_keys.get(cell_id)
+        cached = self.cell_cache.get(cell_id)
+        if key is not None and cached is not None and cached[0] == key:
+            self.log.debug("Skipping cached cell %s", cell_index)
+            cell.outputs = copy.deepcopy(cached[1])
+            return cell
+
+        # kernel state produced by the previous execution isn't valid anymore
+        self.cell_cache.pop(cell_id, None)
+        cell = await super().async_execute_cell(cell, cell_index, execution_count, store_history)
+        if key is not None:
+            self.cell_cache[cell_id] = (key, copy.deepcopy(cell.outputs))
+        return cell
+
+
+class _ResultComm:
+    """Receives result records sent by jsp_result module of the kernel"""
+
+    def __init__(self, client: CustomNotebookClient, comm_id: str, path: str):
+        self.client = client
+        self.comm_id = comm_id
+        self.path = path
+
+    def handle_msg(self, msg):
+        data = msg['content']['data']
+        if 'data' in data:
+            self.client.result_channel.append(self.path, data['data'])
+        if data.get('close'):
+            self.client.close_result(self.comm_id)
+
+
 class EngineHolder:
     _key: EngineKey
-    _client: PapermillNotebookClient
+    _client: CustomNotebookClient
     _last_used_time: float
+    _last_checked_time: float
     _busy: bool = False
+    _broken: bool = False
 
-    def __init__(self, key: EngineKey, client: PapermillNotebookClient):
+    def __init__(self, key: EngineKey, client: CustomNotebookClient):
         self._key = key
         self._client = client
         self._last_used_time = time.time()
+        self._last_checked_time = self._last_used_time
 
     def __str__(self):
-        return f"Engine(key={self._key}, last_used_time={self._last_used_time}, is_busy={self._busy})"
+        return (f"Engine(key={self._key}, last_used_time={self._last_used_time}, is_busy={self._busy}, "
+                f"is_broken={self._broken})")
 
-    async def async_execute(self, nb_man):
+    async def async_execute(self, nb_man, execution_timeout: float = None, interrupt_timeout: float = 10,
+                            incremental: bool = False, reset_namespace: bool = False,
+                            preserved_names: Iterable[str] = (), memory_limit: int = 0):
+        """
+        Executes notebook using the holden client.
+
+        Args:
+            nb_man (NotebookExecutionManager): Wrapper for execution state of a notebook.
+            execution_timeout (float): Duration in seconds to wait for the whole notebook execution (default: never).
+            interrupt_timeout (float): Duration in seconds to wait for the kernel response after interruption.
+                The kernel is restarted when it doesn't respond in time.
+            incremental (bool): Flag for whether or not to skip unchanged cacheable cells.
+            reset_namespace (bool): Flag for whether or not to delete variables of the execution from the kernel.
+            preserved_names (Iterable[str]): Names which aren't deleted by the namespace reset.
+            memory_limit (int): Resident memory of the kernel in bytes after the execution, the kernel is restarted
+                when it uses more memory (default: no limit).
+        """
         if self._busy:
             raise EngineBusyError(
                 f"Notebook client related to '{self._key}' has been busy since {self._get_last_used_date_time()}")
@@ -69,37 +222,310 @@ class EngineHolder:
             # accept new notebook into (possibly) existing client
             self._client.nb_man = nb_man
             self._client.nb = nb_man.nb
+            self._client.cell_cache_keys = compute_cell_cache_keys(nb_man.nb) if incremental else {}
+            # peak memory of the kernel is measured for each execution
+            reset_peak_rss(get_kernel_pid(self._client.km))
             # reuse client connection to existing kernel
-            output = await self._client.async_execute(cleanup_kc=False)
+            # execution isn't cancelled directly because nbclient treats cancellation as kernel death
+            execution = asyncio.ensure_future(self._client.async_execute(cleanup_kc=False))
+            try:
+                done, _ = await asyncio.wait({execution}, timeout=execution_timeout)
+            except asyncio.CancelledError:
+                await self._release_kernel(execution, interrupt_timeout)
+                raise
+            if not done:
+                await self._release_kernel(execution, interrupt_timeout)
+                raise ExecutionTimeoutError(
+                    f"Notebook execution related to '{self._key}' exceeded {execution_timeout} sec")
+            try:
+                output = execution.result()
+            except CellTimeoutError:
+                # kernel keeps executing the timed out cell until it is interrupted
+                await self._release_kernel(execution, interrupt_timeout)
+                raise
+            peak_rss = read_peak_rss(get_kernel_pid(self._client.km))
+            if peak_rss is not None:
+                nb_man.nb.metadata.setdefault('j-sp', {})['kernel_peak_rss'] = peak_rss
             # renumber executions
             for i, cell in enumerate(nb_man.nb.cells):
                 if 'execution_count' in cell:
                     cell['execution_count'] = i + 1
+            # memory is released before the engine becomes idle
+            await self._release_memory(reset_namespace, preserved_names, memory_limit)
 
             return output
         finally:
+            if self._client.result_channel is not None:
+                # results which aren't closed by the notebook are complete when execution ends
+                self._client.close_results()
+            self._last_used_time = time.time()
             self._busy = False
 
+    async def _release_kernel(self, execution: asyncio.Future, interrupt_timeout: float):
+        try:
+            await ensure_async(self._client.km.interrupt_kernel())
+            await asyncio.wait_for(self._wait_for_kernel_idle(execution), interrupt_timeout)
+            CustomEngine.logger.info("Kernel related to '%s' is interrupted", self._key)
+            return
+        except Exception as error:
+            CustomEngine.logger.warning("Kernel related to '%s' isn't interrupted in %s sec, restarting",
+                                        self._key, interrupt_timeout, exc_info=error)
+        if not execution.done():
+            execution.cancel()
+            # nbclient reports cancelled execution as DeadKernelError, it is expected here
+            execution.add_done_callback(lambda future: future.cancelled() or future.exception())
+        await self.async_restart_kernel()
+
+    async def _release_memory(self, reset_namespace: bool, preserved_names: Iterable[str], memory_limit: int):
+        if reset_namespace:
+            # variables defined by cached cells are used by the next execution
+            preserved = set(preserved_names) | get_stored_names(self._client.nb, self._client.cell_cache.keys())
+            try:
+                await execute_silently(self._client.kc, RESET_NAMESPACE_CODE % sorted(preserved),
+                                       self._client.startup_timeout)
+            except Exception as error:
+                CustomEngine.logger.warning("Namespace of kernel related to '%s' isn't reset", self._key,
+                                            exc_info=error)
+        if memory_limit <= 0:
+            return
+        rss = read_rss(get_kernel_pid(self._client.km))
+        if rss is not None and rss > memory_limit:
+            CustomEngine.logger.info("Kernel related to '%s' uses %d bytes over %d limit, restarting", self._key,
+                                     rss, memory_limit)
+            await self.async_restart_kernel()
+
+    async def async_restart_kernel(self):
+        """Restarts the kernel in place, the engine is marked as broken when the kernel isn't restarted"""
+        try:
+            self._client.cell_cache.clear()
+            await ensure_async(self._client.km.restart_kernel(now=True))
+            # kernel without client is prepared when the client is started by the execution
+            if self._client.kc is not None:
+                await ensure_async(self._client.kc.wait_for_ready(timeout=self._client.startup_timeout))
+                await self._client.async_prepare_kernel()
+            self._last_checked_time = time.time()
+            CustomEngine.logger.info("Kernel related to '%s' is restarted", self._key)
+        except Exception as error:
+            CustomEngine.logger.error("Kernel related to '%s' isn't restarted", self._key, exc_info=error)
+            self._broken = True
+
+    async def async_check_health(self, timeout: float, ping: bool = True) -> bool:
+        """
+        Checks that the kernel process is alive and, when ping is requested, the kernel replies to kernel info
+        request in time. Engine which kernel isn't started yet is healthy. Kernel taken from the pool doesn't have
+        kernel client until the first execution, only its process is checked.
+        """
+        if self._client is None or self._client.km is None or not self._client.km.has_kernel:
+            return True
+        try:
+            if not await ensure_async(self._client.km.is_alive()):
+                CustomEngine.logger.warning("Kernel related to '%s' is dead", self._key)
+                return False
+            if ping and self._client.kc is not None:
+                await asyncio.wait_for(self._request_kernel_info(), timeout)
+                self._last_checked_time = time.time()
+            return True
+        except asyncio.TimeoutError:
+            CustomEngine.logger.warning("Kernel related to '%s' doesn't reply in %s sec", self._key, timeout)
+            return False
+        except Exception as error:
+            CustomEngine.logger.warning("Kernel related to '%s' isn't checked", self._key, exc_info=error)
+            return False
+
+    async def _wait_for_kernel_idle(self, execution: asyncio.Future):
+        # interrupted cell fails with KeyboardInterrupt, this error is expected here
+        await asyncio.wait({execution})
+        if not execution.cancelled():
+            execution.exception()
+        return await self._request_kernel_info()
+
+    async def _request_kernel_info(self):
+        # shell messages are handled in order, so the reply means that kernel is ready for the next execution
+        msg_id = self._client.kc.kernel_info()
+        while True:
+            try:
+                msg = await ensure_async(self._client.kc.shell_channel.get_msg(timeout=1))
+            except Empty:
+                continue
+            if msg['parent_header'].get('msg_id') == msg_id:
+                return msg
+
     def get_last_used_time(self) -> float:
         return self._last_used_time
 
+    def get_last_checked_time(self) -> float:
+        return self._last_checked_time
+
+    def is_broken(self) -> bool:
+        return self._broken
+
     def close(self):
         if self._client is not None:
-            self._client.kc.shutdown()
+            # kernel isn't started when the engine is removed before its first execution
+            if self._client.kc is not None:
+                self._client.kc.shutdown()
             self._client = None
 
     def _get_last_used_date_time(self):
         return datetime.fromtimestamp(self._last_used_time)
 
 
+def get_kernel_pid(km) -> Optional[int]:
+    provisioner = getattr(km, 'provisioner', None) if km is not None else None
+    return getattr(provisioner, 'pid', None)
+
+
+def reset_peak_rss(pid: Optional[int]):
+    if pid is None:
+        return
+    try:
+        # resets VmHWM of the process, it's supported by Linux only
+        with open(f'/proc/{pid}/clear_refs', 'w') as file:
+            file.write('5')
+    except OSError:
+        pass
+
+
+def read_peak_rss(pid: Optional[int]) -> Optional[int]:
+    """Returns peak resident memory of the process in bytes or None when it can't be read"""
+    return _read_proc_status_size(pid, 'VmHWM:')
+
+
+def read_rss(pid: Optional[int]) -> Optional[int]:
+    """Returns resident memory of the process in bytes, psutil is used when it is installed"""
+    if pid is None:
+        return None
+    if psutil is not None:
+        try:
+            return psutil.Process(pid).memory_info().rss
+        except psutil.Error:
+            return None
+    return _read_proc_status_size(pid, 'VmRSS:')
+
+
+def _read_proc_status_size(pid: Optional[int], field: str) -> Optional[int]:
+    if pid is None:
+        return None
+    try:
+        with open(f'/proc/{pid}/status', 'r') as file:
+            for line in file:
+                if line.startswith(field):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class EngineRegistry:
+    """
+    Engines by key. An engine is used by one execution at a time: executions of the same key wait for the lock
+    of the key, so the client is created once and its kernel isn't shared by concurrent executions.
+    """
+
+    def __init__(self):
+        self._engines: Dict[EngineKey, EngineHolder] = {}
+        self._locks: Dict[EngineKey, asyncio.Lock] = {}
+        # number of executions holding or waiting for the lock of the key
+        self._users: Dict[EngineKey, int] = {}
+        # task holding the lock of the key, it acquires the engine without waiting
+        self._owners: Dict[EngineKey, asyncio.Task] = {}
+
+    def __len__(self):
+        return len(self._engines)
+
+    def get(self, key: EngineKey) -> Optional[EngineHolder]:
+        return self._engines.get(key)
+
+    def keys(self) -> List[EngineKey]:
+        return list(self._engines.keys())
+
+    def is_in_use(self, key: EngineKey) -> bool:
+        return key in self._users
+
+    @asynccontextmanager
+    async def acquire(self, key: EngineKey,
+                      factory: Optional[Callable[[], CustomNotebookClient]]) -> AsyncIterator[Optional[EngineHolder]]:
+        """
+        Waits for the engine of the key, the engine is created by the first execution and reused by the next ones.
+        None is yielded for absent engine when the factory isn't passed.
+        The task which has reserved the key acquires the engine without waiting.
+        """
+        if self._owners.get(key) is asyncio.current_task():
+            yield self._get_or_create(key, factory)
+            return
+        async with self.reserve(key):
+            yield self._get_or_create(key, factory)
+
+    @asynccontextmanager
+    async def reserve(self, key: EngineKey):
+        """Waits for the lock of the key and holds it for the current task"""
+        lock = self._locks.get(key)
+        if lock is None:
+            lock = self._locks[key] = asyncio.Lock()
+        self._users[key] = self._users.get(key, 0) + 1
+        try:
+            async with lock:
+                self._owners[key] = asyncio.current_task()
+                try:
+                    yield
+                finally:
+                    del self._owners[key]
+        finally:
+            users = self._users[key] - 1
+            if users > 0:
+                self._users[key] = users
+            else:
+                # lock isn't kept for keys without executions
+                del self._users[key]
+                del self._locks[key]
+
+    def _get_or_create(self, key: EngineKey,
+                       factory: Optional[Callable[[], CustomNotebookClient]]) -> Optional[EngineHolder]:
+        engine_holder = self._engines.get(key)
+        if engine_holder is None and factory is not None:
+            engine_holder = self._engines[key] = EngineHolder(key, factory())
+        return engine_holder
+
+    def replace(self, key: EngineKey, factory: Callable[[], CustomNotebookClient]) -> EngineHolder:
+        """Closes the engine of the key and registers a new one, it is called by the holder of the key lock"""
+        self.remove(key)
+        engine_holder = self._engines[key] = EngineHolder(key, factory())
+        return engine_holder
+
+    def remove(self, key: EngineKey, engine_holder: EngineHolder = None) -> Optional[EngineHolder]:
+        """Removes and closes the engine of the key. When the engine is passed, it is removed only if it is registered"""
+        current = self._engines.get(key)
+        if current is None or (engine_holder is not None and current is not engine_holder):
+            return None
+        del self._engines[key]
+        current.close()
+        return current
+
+
 class EngineBusyError(RuntimeError):
     pass
 
 
+class ExecutionTimeoutError(TimeoutError):
+    pass
+
+
 class CustomEngine(NBClientEngine):
     out_of_use_engine_time: int = 60 * 60
     restart_kernel_on_error: bool = False
-    metadata_dict: dict = {}
+    notebook_execution_timeout: float = None
+    kernel_interrupt_timeout: float = 10
+    incremental_execution: bool = False
+    reset_kernel_namespace: bool = False
+    preserved_kernel_names: list = []
+    # bytes, zero or negative value disables the limit
+    kernel_memory_limit: int = 0
+    # idle kernels are checked periodically, zero or negative value disables the checks
+    kernel_health_check_interval: float = 30
+    kernel_health_check_timeout: float = 5
+    kernel_pool: KernelPool = KernelPool()
+    result_channel: ResultChannel = None
+    engine_registry: EngineRegistry = EngineRegistry()
     logger: logging.Logger
 
     # The code of this method is derived from https://github.com/nteract/papermill/blob/2.6.0 under the BSD License.
@@ -219,27 +645,47 @@ class CustomEngine(NBClientEngine):
                 stdout_file=stdout_file,
                 stderr_file=stderr_file,
             )
+            km = cls.kernel_pool.acquire(kernel_name)
+            if km is not None:
+                cls.logger.info('Created papermill notebook client for %s with pooled kernel %s', key, km.kernel_id)
+                return CustomNotebookClient(nb_man, km=km, kernel_cwd=os.getcwd(), result_channel=cls.result_channel,
+                                            **final_kwargs)
             cls.logger.info('Created papermill notebook client for %s', key)
-            return PapermillNotebookClient(nb_man, **final_kwargs)
-
-        engine_holder: EngineHolder = cls.get_or_create_engine_metadata(key, create_client)
-        try:
-            return await engine_holder.async_execute(nb_man)
-        except DeadKernelError as error:
-            cls.logger.error('Client related to %s is died', key, exc_info=error)
-            cls.remove_engine(key)
-            raise error
-        except RuntimeError as error:
-            if str(error).startswith("Kernel didn't respond in"):
-                cls.logger.error("Client related to %s doesn't respond", key, exc_info=error)
-                cls.remove_engine(key)
-            raise error
-        except Exception as error:
-            if cls.restart_kernel_on_error:
-                cls.logger.error("Client related to %s catches error", key, exc_info=error)
-                cls.remove_engine(key)
-            raise error
+            return CustomNotebookClient(nb_man, result_channel=cls.result_channel, **final_kwargs)
 
+        cls.remove_out_of_date_engines(key)
+        async with cls.engine_registry.acquire(key, create_client) as engine_holder:
+            # the process is checked before each execution, the kernel is pinged when it isn't checked recently
+            ping = 0 < cls.kernel_health_check_interval < time.time() - engine_holder.get_last_checked_time()
+            if not await engine_holder.async_check_health(cls.kernel_health_check_timeout, ping):
+                await engine_holder.async_restart_kernel()
+                if engine_holder.is_broken():
+                    cls.logger.warning("Kernel related to %s isn't recovered, creating new client", key)
+                    engine_holder = cls.engine_registry.replace(key, create_client)
+            try:
+                return await engine_holder.async_execute(nb_man, execution_timeout=cls.notebook_execution_timeout,
+                                                         interrupt_timeout=cls.kernel_interrupt_timeout,
+                                                         incremental=cls.incremental_execution,
+                                                         reset_namespace=cls.reset_kernel_namespace,
+                                                         preserved_names=cls.preserved_kernel_names,
+                                                         memory_limit=cls.kernel_memory_limit)
+            except DeadKernelError as error:
+                cls.logger.error('Client related to %s is died', key, exc_info=error)
+                cls.remove_engine(key, engine_holder)
+                raise error
+            except RuntimeError as error:
+                if str(error).startswith("Kernel didn't respond in"):
+                    cls.logger.error("Client related to %s doesn't respond", key, exc_info=error)
+                    cls.remove_engine(key, engine_holder)
+                raise error
+            except Exception as error:
+                if cls.restart_kernel_on_error:
+                    cls.logger.error("Client related to %s catches error", key, exc_info=error)
+                    cls.remove_engine(key, engine_holder)
+                raise error
+            finally:
+                if engine_holder.is_broken() and cls.remove_engine(key, engine_holder):
+                    cls.logger.error("Client related to %s can't be recovered after interruption", key)
 
     @classmethod
     def create_logger(cls):
@@ -254,32 +700,95 @@ class CustomEngine(NBClientEngine):
         cls.restart_kernel_on_error = value
 
     @classmethod
-    def get_or_create_engine_metadata(cls, key: EngineKey, func):
-        cls.remove_out_of_date_engines(key)
+    def set_notebook_execution_timeout(cls, value: float):
+        cls.notebook_execution_timeout = value if value and value > 0 else None
 
-        engine_holder: EngineHolder = cls.metadata_dict.get(key)
-        if engine_holder is None:
-            engine_holder = EngineHolder(key, func())
-            cls.metadata_dict[key] = engine_holder
+    @classmethod
+    def set_kernel_interrupt_timeout(cls, value: float):
+        cls.kernel_interrupt_timeout = value
 
-        return engine_holder
+    @classmethod
+    def set_incremental_execution(cls, value: bool):
+        cls.incremental_execution = value
+
+    @classmethod
+    def set_kernel_memory_hygiene(cls, reset_namespace: bool, preserved_names: list, memory_limit: int):
+        cls.reset_kernel_namespace = reset_namespace
+        cls.preserved_kernel_names = preserved_names
+        cls.kernel_memory_limit = memory_limit
 
     @classmethod
-    def remove_engine(cls, key: EngineKey):
-        engine_holder: EngineHolder = cls.metadata_dict.pop(key)
-        if engine_holder is not None:
-            engine_holder.close()
-            cls.logger.info("unregistered '%s' papermill engine", key)
+    def set_kernel_health_check(cls, interval: float, timeout: float):
+        cls.kernel_health_check_interval = interval
+        cls.kernel_health_check_timeout = timeout
+
+    @classmethod
+    def set_kernel_pool(cls, size: int, preload_modules: list):
+        cls.kernel_pool.configure(size, preload_modules)
+
+    @classmethod
+    def set_result_channel(cls, result_channel: ResultChannel):
+        cls.result_channel = result_channel
+
+    @classmethod
+    def reserve_engine(cls, engine_user_id: str, notebook_file: str):
+        """
+        Waits until the engine of the user and the notebook isn't used by other executions and holds it for
+        the current task, so the execution doesn't take resources while it waits for the engine.
+        """
+        return cls.engine_registry.reserve(EngineKey(engine_user_id, notebook_file))
+
+    @classmethod
+    async def run_health_checks(cls):
+        """Periodically checks idle kernels and restarts unhealthy ones, so executions don't get stale kernels"""
+        while cls.kernel_health_check_interval > 0:
+            await asyncio.sleep(cls.kernel_health_check_interval)
+            try:
+                await cls.check_engines_health()
+            except Exception as error:
+                cls.logger.error('kernels health check failure', exc_info=error)
+
+    @classmethod
+    async def check_engines_health(cls) -> int:
+        """Checks engines which aren't used by executions, returns number of restarted kernels"""
+        restarted = 0
+        for key in cls.engine_registry.keys():
+            if cls.engine_registry.is_in_use(key):
+                continue
+            async with cls.engine_registry.acquire(key, None) as engine_holder:
+                if engine_holder is None or await engine_holder.async_check_health(cls.kernel_health_check_timeout):
+                    continue
+                await engine_holder.async_restart_kernel()
+                restarted += 1
+                if engine_holder.is_broken():
+                    # the next execution creates new client
+                    cls.remove_engine(key, engine_holder)
+        return restarted
+
+    @classmethod
+    def remove_engine(cls, key: EngineKey, engine_holder: EngineHolder = None) -> bool:
+        """Removes the engine of the key, the passed engine is removed only if it hasn't been replaced yet"""
+        if cls.engine_registry.remove(key, engine_holder) is None:
+            return False
+        cls.logger.info("unregistered '%s' papermill engine", key)
+        return True
+
+    @classmethod
+    def remove_user_engines(cls, user_id: str):
+        # engines used by executions are removed as out of date later
+        for key in [key for key in cls.engine_registry.keys()
+                    if key.user_id == user_id and not cls.engine_registry.is_in_use(key)]:
+            cls.remove_engine(key)
 
     @classmethod
     def remove_out_of_date_engines(cls, exclude_key: EngineKey):
         now = time.time()
         dead_line = now - cls.out_of_use_engine_time
-        out_of_use_engines = [key for key, metadata in cls.metadata_dict.items() if
-                              key != exclude_key and metadata.get_last_used_time() < dead_line]
+        out_of_use_engines = [key for key in cls.engine_registry.keys()
+                              if key != exclude_key and not cls.engine_registry.is_in_use(key)
+                              and cls.engine_registry.get(key).get_last_used_time() < dead_line]
         for key in out_of_use_engines:
-            engine_holder: EngineHolder = cls.metadata_dict.pop(key)
-            engine_holder.close()
+            engine_holder: EngineHolder = cls.engine_registry.remove(key)
             if cls.logger.isEnabledFor(logging.INFO):
                 cls.logger.info(
                     f"unregistered '{key}' papermill engine, last used time "
@@ -13,15 +13,14 @@
 #  limitations under the License.
 import logging
 import re
+from typing import Dict, List, Optional
 
 from papermill.models import Parameter
 from papermill.translators import PythonTranslator, papermill_translators
 
 class CustomPythonTranslator(PythonTranslator):
-    # Pattern to capture parameters within cell input
-    PARAMETER_PATTERN = re.compile(
-        r"^(?P<target>\w[\w_]*)\s*(:\s*[\"']?(?P<annotation>\w[\w_\[\],\s]*)[\"']?\s*)?=\s*(?P<value>(\"\"\"(?:\\.|[^\\])*?\"\"\"|\'\'\'(?:\\.|[^\\])*?\'\'\'|\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*'|[^\#]*?))(\s*#\s*(type:\s*(?P<type_comment>[^\s]*)\s*)?(?P<help>.*))?$"
-    )
+    # Pattern to capture parameter name and annotation, the value and the comment are scanned by _parse_definition
+    DEFINITION_PREFIX_PATTERN = re.compile(r"(?P<target>\w+)\s*(:\s*[\"']?(?P<annotation>\w[\w\[\],\s]*)[\"']?\s*)?=\s*")
     logger: logging.Logger
 
     @classmethod
@@ -80,59 +79,12 @@ class CustomPythonTranslator(PythonTranslator):
                     A list of all parameters
                 """
         params = []
-        src = parameters_cell['source']
-
-        def flatten_accumulator(accumulator):
-            """Flatten a multilines variable definition.
-
-            Remove all comments except on the latest line - will be interpreted as help.
-
-            Args:
-                accumulator (List[str]): Line composing the variable definition
-            Returns:
-                Flatten definition
-            """
-            flat_string = ""
-            for line in accumulator[:-1]:
-                if "#" in line:
-                    comment_pos = line.index("#")
-                    flat_string += line[:comment_pos].strip()
-                else:
-                    flat_string += line.strip()
-            if len(accumulator):
-                flat_string += accumulator[-1].strip()
-            return flat_string
-
-        # Some common type like dictionaries or list can be expressed over multiline.
-        # To support the parsing of such case, the cell lines are grouped between line
-        # actually containing an assignment. In each group, the commented and empty lines
-        # are skip; i.e. the parameter help can only be given as comment on the last variable
-        # line definition
-        grouped_variable = []
-        accumulator = []
-        for iline, line in enumerate(src.splitlines()):
-            if len(line.strip()) == 0 or line.strip().startswith('#'):
-                continue  # Skip blank and comment
-
-            nequal = line.count("=")
-            if nequal > 0:
-                grouped_variable.append(flatten_accumulator(accumulator))
-                accumulator = []
-
-            accumulator.append(line)
-        grouped_variable.append(flatten_accumulator(accumulator))
-
-        for definition in grouped_variable:
+        for definition in _group_definitions(parameters_cell['source']):
             if len(definition) == 0:
                 continue
 
-            match = re.match(cls.PARAMETER_PATTERN, definition)
-            if match is not None:
-                attr = match.groupdict()
-                if attr["target"] is None:  # Fail to get variable name
-                    cls.logger.debug("The %s definition doesn't contain 'target'", definition)
-                    continue
-
+            attr = _parse_definition(definition, cls.DEFINITION_PREFIX_PATTERN)
+            if attr is not None:
                 type_name = str(attr["annotation"] or attr["type_comment"] or None)
                 parameter = Parameter(name=attr["target"].strip(), inferred_type_name=type_name.strip(),
                                       default=str(attr["value"]).strip(), help=str(attr["help"] or "").strip(), )
@@ -142,7 +94,106 @@ class CustomPythonTranslator(PythonTranslator):
             else:
                 cls.logger.debug("The %s definition isn't matched to the expression pattern", definition)
 
-
         return params
 
+
+def _group_definitions(src: str) -> List[str]:
+    """
+    Groups the cell lines between lines containing an assignment and flattens each group.
+
+    Some common type like dictionaries or list can be expressed over multiline.
+    In each group, the commented and empty lines are skipped and comments are removed except on the latest line,
+    i.e. the parameter help can only be given as comment on the last variable line definition.
+    """
+    definitions = []
+    accumulator = []
+    for line in src.splitlines():
+        stripped = line.strip()
+        if len(stripped) == 0 or stripped.startswith('#'):
+            continue  # Skip blank and comment
+
+        if '=' in line:
+            definitions.append(_flatten(accumulator))
+            accumulator = []
+
+        accumulator.append(line)
+    definitions.append(_flatten(accumulator))
+    return definitions
+
+
+def _flatten(accumulator: List[str]) -> str:
+    parts = []
+    for line in accumulator[:-1]:
+        comment_pos = line.find('#')
+        parts.append((line[:comment_pos] if comment_pos >= 0 else line).strip())
+    if len(accumulator):
+        parts.append(accumulator[-1].strip())
+    return ''.join(parts)
+
+
+def _parse_definition(definition: str, prefix_pattern: re.Pattern) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Parses `<target>[: <annotation>] = <value> [# [type: <type_comment>] <help>]` definition in a single pass.
+
+    The value is a string literal if the rest of the definition is a comment, otherwise it lasts up to the first `#`.
+    """
+    match = prefix_pattern.match(definition)
+    if match is None:
+        return None
+    start = match.end()
+    end = _scan_value(definition, start)
+    attr = {'target': match.group('target'), 'annotation': match.group('annotation'),
+            'value': definition[start:end], 'type_comment': None, 'help': None}
+
+    comment = _COMMENT_PATTERN.match(definition, end)
+    if comment is not None:
+        attr['type_comment'] = comment.group('type_comment')
+        attr['help'] = comment.group('help')
+    return attr
+
+
+# patterns below don't backtrack, their alternatives can't match the same text
+_COMMENT_OR_END_PATTERN = re.compile(r"\Z|\s*#")
+_COMMENT_PATTERN = re.compile(r"\s*#\s*(?:type:\s*(?P<type_comment>\S*)\s*)?(?P<help>.*)")
+_QUOTED_PATTERNS = {
+    '"': re.compile(r'"(?:[^"\\]|\\.)*"'),
+    "'": re.compile(r"'(?:[^'\\]|\\.)*'"),
+}
+
+
+def _scan_value(definition: str, start: int) -> int:
+    """Returns end position of the value starting at the start position"""
+    for quote in ('"""', "'''"):
+        if definition.startswith(quote, start):
+            end = _scan_triple_quoted(definition, start, quote)
+            if end is not None:
+                return end
+    for quote, pattern in _QUOTED_PATTERNS.items():
+        if definition.startswith(quote, start):
+            match = pattern.match(definition, start)
+            if match is not None and _COMMENT_OR_END_PATTERN.match(definition, match.end()):
+                return match.end()
+
+    # unquoted value lasts up to the end or up to the comment
+    comment_pos = definition.find('#', start)
+    if comment_pos < 0:
+        return len(definition)
+    return start + len(definition[start:comment_pos].rstrip())
+
+
+def _scan_triple_quoted(definition: str, start: int, quote: str) -> Optional[int]:
+    """Returns the end of the shortest literal followed by a comment or the end"""
+    body_start = start + len(quote)
+    pos = definition.find(quote, body_start)
+    while pos >= 0:
+        # the quote isn't escaped when it is preceded by even number of backslashes
+        backslash_pos = pos
+        while backslash_pos > body_start and definition[backslash_pos - 1] == '\\':
+            backslash_pos -= 1
+        if (pos - backslash_pos) % 2 == 0 and _COMMENT_OR_END_PATTERN.match(definition, pos + len(quote)):
+            return pos + len(quote)
+        pos = definition.find(quote, pos + 1)
+    return None
+
+
 papermill_translators.register("python", CustomPythonTranslator)
\ No newline at end of file
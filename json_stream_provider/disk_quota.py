@@ -0,0 +1,196 @@
+#  Copyright 2025 Exactpro (Exactpro Systems Limited)
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import logging
+import os
+import shutil
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+logger: logging.Logger = logging.getLogger('j-sp')
+
+POLICY_EVICT = 'evict'
+POLICY_REFUSE = 'refuse'
+POLICIES = (POLICY_EVICT, POLICY_REFUSE)
+
+# eviction is started when usage reaches the high watermark of quota and stops at the low watermark
+HIGH_WATERMARK = 0.9
+LOW_WATERMARK = 0.8
+
+
+class RunFiles:
+    """Files produced by a notebook execution: (directory, path, size) for each file or directory of images"""
+    __slots__ = ('files',)
+
+    def __init__(self, files: List[Tuple[str, str, int]]):
+        self.files = files
+
+    @property
+    def size(self) -> int:
+        return sum(size for _, _, size in self.files)
+
+
+class DiskQuota:
+    """
+    Tracks bytes used by the output directories and by each engine user. Usage is increased as tasks finish,
+    the baseline of directories is set by cleanup pass, so the directories aren't rescanned for each execution.
+    """
+
+    def __init__(self):
+        self.directory_quotas: Dict[str, int] = {}
+        self.user_quota = 0
+        self.policy = POLICY_EVICT
+        self._directory_usage: Dict[str, int] = {}
+        self._user_runs: Dict[str, Deque[RunFiles]] = {}
+        self._user_usage: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, directory_quotas: Dict[str, int], user_quota: int, policy: str):
+        if policy not in POLICIES:
+            raise ValueError(f"Quota policy should be one of {', '.join(POLICIES)}, actual '{policy}'")
+        with self._lock:
+            self.directory_quotas = {os.path.abspath(directory): quota
+                                     for directory, quota in directory_quotas.items() if directory}
+            self.user_quota = user_quota
+            self.policy = policy
+
+    def is_enabled(self) -> bool:
+        return self.user_quota > 0 or any(quota > 0 for quota in self.directory_quotas.values())
+
+    def set_usage(self, directory: str, used: int):
+        """Sets actual usage of the directory measured by cleanup pass"""
+        with self._lock:
+            self._directory_usage[os.path.abspath(directory)] = used
+
+    def get_usage(self, directory: str) -> int:
+        with self._lock:
+            return self._directory_usage.get(os.path.abspath(directory), 0)
+
+    def get_user_usage(self, user_id: str) -> int:
+        with self._lock:
+            return self._user_usage.get(user_id, 0)
+
+    def add(self, user_id: str, paths: Dict[str, List[str]]) -> RunFiles:
+        """Accounts files of the finished execution, paths are grouped by the output directory"""
+        files = []
+        for directory, directory_paths in paths.items():
+            for path in directory_paths:
+                size = _get_size(path)
+                if size > 0:
+                    files.append((os.path.abspath(directory), path, size))
+        run = RunFiles(files)
+        with self._lock:
+            for directory, _, size in files:
+                self._directory_usage[directory] = self._directory_usage.get(directory, 0) + size
+            runs = self._user_runs.get(user_id)
+            if runs is None:
+                runs = self._user_runs[user_id] = deque()
+            runs.append(run)
+            self._user_usage[user_id] = self._user_usage.get(user_id, 0) + run.size
+        return run
+
+    def get_exceeded(self, user_id: str) -> Optional[str]:
+        """Returns reason when a directory or the user has used the whole quota, otherwise None"""
+        with self._lock:
+            for directory, quota in self.directory_quotas.items():
+                if 0 < quota <= self._directory_usage.get(directory, 0):
+                    return f"Quota of '{os.path.basename(directory.rstrip(os.sep))}' directory " \
+                           f"({quota} bytes) is exhausted"
+            if 0 < self.user_quota <= self._user_usage.get(user_id, 0):
+                return f"Quota of user ({self.user_quota} bytes) is exhausted"
+        return None
+
+    def get_near_limit_directories(self) -> List[str]:
+        """Returns directories which usage reached the high watermark of their quota"""
+        with self._lock:
+            return [directory for directory, quota in self.directory_quotas.items()
+                    if quota > 0 and self._directory_usage.get(directory, 0) >= quota * HIGH_WATERMARK]
+
+    def is_user_near_limit(self, user_id: str) -> bool:
+        with self._lock:
+            return self.user_quota > 0 and self._user_usage.get(user_id, 0) >= self.user_quota * HIGH_WATERMARK
+
+    def evict_user(self, user_id: str) -> int:
+        """
+        Removes files of the oldest executions of the user until the usage falls to the low watermark of quota.
+        Files of the latest execution are kept. Returns number of freed bytes.
+        """
+        victims = []
+        with self._lock:
+            runs = self._user_runs.get(user_id)
+            used = self._user_usage.get(user_id, 0)
+            while runs and len(runs) > 1 and used > self.user_quota * LOW_WATERMARK:
+                run = runs.popleft()
+                used -= run.size
+                victims.append(run)
+            self._user_usage[user_id] = used
+            for run in victims:
+                for directory, _, size in run.files:
+                    self._directory_usage[directory] = max(self._directory_usage.get(directory, 0) - size, 0)
+        freed = 0
+        for run in victims:
+            for _, path, size in run.files:
+                if _remove(path):
+                    freed += size
+        if victims:
+            logger.info("%d oldest executions of '%s' user are evicted, %d bytes are freed", len(victims), user_id,
+                        freed)
+        return freed
+
+    def reconcile(self):
+        """Forgets files removed by cleanup pass, so usage of users isn't overestimated"""
+        with self._lock:
+            user_runs = {user_id: list(runs) for user_id, runs in self._user_runs.items()}
+        removed = {user_id: [run for run in runs if not any(os.path.exists(path) for _, path, _ in run.files)]
+                   for user_id, runs in user_runs.items()}
+        with self._lock:
+            for user_id, runs in removed.items():
+                actual = self._user_runs.get(user_id)
+                if actual is None:
+                    continue
+                for run in runs:
+                    try:
+                        actual.remove(run)
+                    except ValueError:
+                        continue
+                    self._user_usage[user_id] = max(self._user_usage.get(user_id, 0) - run.size, 0)
+                if not actual:
+                    del self._user_runs[user_id]
+                    self._user_usage.pop(user_id, None)
+
+
+def _get_size(path: str) -> int:
+    """Returns bytes owned by the path, hard links share space with the image store, so they aren't counted"""
+    try:
+        if os.path.isdir(path):
+            return sum(_get_size(entry.path) for entry in os.scandir(path))
+        stat = os.stat(path)
+        return stat.st_size if stat.st_nlink == 1 else 0
+    except OSError:
+        return 0
+
+
+def _remove(path: str) -> bool:
+    try:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.unlink(path)
+        return True
+    except FileNotFoundError:
+        return False
+    except OSError as error:
+        logger.warning("'%s' isn't removed by quota eviction", path, exc_info=error)
+        return False
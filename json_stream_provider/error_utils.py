@@ -13,30 +13,54 @@
 #  limitations under the License.
 
 import traceback
-from typing import Dict, Tuple
+from typing import Dict, List, Tuple
 
 from nbclient.exceptions import CellExecutionError
 from nbformat.reader import NotJSONError
 
 
+MAX_ERROR_LINES = 200
+MAX_ERROR_LINE_LENGTH = 2000
+MAX_CAUSE_DEPTH = 10
+
+
 def prepare_response_error(error: Exception) -> Tuple[str, Dict[str, any]]:
+    """
+    Renders the error to short message and details limited by number and length of lines.
+    The result doesn't refer to the error, so it can be kept instead of the error and its traceback frames.
+    """
     details: Dict[str, any] = resolve_cause({}, error)
-    details['traceback'] = traceback.format_exception(type(error), error, error.__traceback__)
+    details['traceback'] = cap_lines(traceback.format_exception(type(error), error, error.__traceback__))
 
     if isinstance(error, CellExecutionError):
-        details['details'] = error.traceback.split('\n')
-        return f"Notebook execution failed: {error.ename}: {error.evalue}", details
+        details['details'] = cap_lines(error.traceback.split('\n'))
+        return cap_line(f"Notebook execution failed: {error.ename}: {error.evalue}"), details
     elif isinstance(error, NotJSONError):
-        return f"Notebook read failed: {type(error).__name__}: {error}", details
+        return cap_line(f"Notebook read failed: {type(error).__name__}: {error}"), details
     else:
-        return f"{type(error).__name__}: {error}", details
+        return cap_line(f"{type(error).__name__}: {error}"), details
+
+
+def cap_line(line: str) -> str:
+    if len(line) > MAX_ERROR_LINE_LENGTH:
+        return f"{line[:MAX_ERROR_LINE_LENGTH]}... ({len(line) - MAX_ERROR_LINE_LENGTH} characters are skipped)"
+    return line
+
+
+def cap_lines(lines: List[str]) -> List[str]:
+    """Keeps the first and the last lines, the last lines of a traceback are the most specific"""
+    if len(lines) > MAX_ERROR_LINES:
+        head = MAX_ERROR_LINES // 4
+        tail = MAX_ERROR_LINES - head
+        lines = lines[:head] + [f"... ({len(lines) - head - tail} lines are skipped)"] + lines[-tail:]
+    return [cap_line(line) for line in lines]
 
 
-def resolve_cause(accumulator: Dict[str, any], error: BaseException) -> Dict[str, any]:
-    if error.__cause__:
+def resolve_cause(accumulator: Dict[str, any], error: BaseException, depth: int = 0) -> Dict[str, any]:
+    if error.__cause__ and depth < MAX_CAUSE_DEPTH:
         cause = error.__cause__
         cause_accumulator: Dict[str, any] = {
-            'error': f"{type(cause).__name__}: {cause}"
+            'error': cap_line(f"{type(cause).__name__}: {cause}")
         }
-        accumulator['cause'] = resolve_cause(cause_accumulator, cause)
+        accumulator['cause'] = resolve_cause(cause_accumulator, cause, depth + 1)
     return accumulator
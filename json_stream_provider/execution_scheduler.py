@@ -0,0 +1,160 @@
+#  Copyright 2025 Exactpro (Exactpro Systems Limited)
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import asyncio
+import heapq
+import itertools
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, List
+
+logger: logging.Logger = logging.getLogger('scheduler')
+
+DEFAULT_PRIORITY = 0
+
+
+class _Request:
+    def __init__(self, user_id: str, priority: int, start_tag: float, finish_tag: float, future: asyncio.Future,
+                 memory: int = 0):
+        self.user_id = user_id
+        self.priority = priority
+        self.start_tag = start_tag
+        self.finish_tag = finish_tag
+        self.future = future
+        self.memory = memory
+
+
+class ExecutionScheduler:
+    """
+    Admits notebook executions according to global and per-user concurrency limits.
+
+    Waiting executions are ordered by priority (higher first) and then by weighted fair queuing
+    finish tag, so a user launching many runs can't starve other users.
+
+    When memory budget is set, an execution is admitted only if its estimated memory fits into the budget
+    left by running executions. The next execution waits for memory instead of being overtaken by smaller ones,
+    an execution which doesn't fit into the whole budget is admitted when nothing else is running.
+    """
+
+    def __init__(self, max_concurrent: int = 8, max_concurrent_per_user: int = 4, memory_budget: int = 0):
+        self._max_concurrent = max_concurrent
+        self._max_concurrent_per_user = max_concurrent_per_user
+        self._memory_budget = memory_budget
+        self._running_memory: int = 0
+        self._running: int = 0
+        self._running_per_user: Dict[str, int] = {}
+        self._queue: List[tuple] = []
+        self._counter = itertools.count()
+        self._virtual_time: float = 0
+        self._user_finish_tags: Dict[str, float] = {}
+
+    def set_limits(self, max_concurrent: int, max_concurrent_per_user: int):
+        self._max_concurrent = max_concurrent
+        self._max_concurrent_per_user = max_concurrent_per_user
+        self._dispatch()
+
+    def set_memory_budget(self, memory_budget: int):
+        self._memory_budget = memory_budget
+        self._dispatch()
+
+    def get_running(self) -> int:
+        return self._running
+
+    def get_waiting(self) -> int:
+        return sum(1 for *_, request in self._queue if not request.future.done())
+
+    @asynccontextmanager
+    async def slot(self, user_id: str, priority: int = DEFAULT_PRIORITY, weight: float = 1, memory: int = 0):
+        await self.acquire(user_id, priority, weight, memory)
+        try:
+            yield
+        finally:
+            self.release(user_id, memory)
+
+    async def acquire(self, user_id: str, priority: int = DEFAULT_PRIORITY, weight: float = 1, memory: int = 0):
+        start_tag = max(self._virtual_time, self._user_finish_tags.get(user_id, 0))
+        finish_tag = start_tag + 1 / weight
+        self._user_finish_tags[user_id] = finish_tag
+
+        request = _Request(user_id, priority, start_tag, finish_tag, asyncio.get_running_loop().create_future(),
+                           memory)
+        heapq.heappush(self._queue, (-priority, finish_tag, next(self._counter), request))
+        self._dispatch()
+        try:
+            await request.future
+        except asyncio.CancelledError:
+            if request.future.done() and not request.future.cancelled():
+                # slot has been granted concurrently with cancellation
+                self.release(user_id, memory)
+            else:
+                self._cancel(request)
+            raise
+
+    def release(self, user_id: str, memory: int = 0):
+        self._running -= 1
+        self._running_memory -= memory
+        running = self._running_per_user.get(user_id, 0) - 1
+        if running > 0:
+            self._running_per_user[user_id] = running
+        else:
+            self._running_per_user.pop(user_id, None)
+        self._dispatch()
+
+    def _cancel(self, request: _Request):
+        request.future.cancel()
+        # the cancelled request doesn't count against fair share of the user
+        finish_tag = self._user_finish_tags.get(request.user_id)
+        if finish_tag is not None:
+            self._user_finish_tags[request.user_id] = max(finish_tag - (request.finish_tag - request.start_tag),
+                                                          self._virtual_time)
+        # the request could block the queue waiting for memory, executions behind it can be admitted now
+        self._dispatch()
+
+    def _dispatch(self):
+        skipped = []
+        while self._queue and not self._is_limit_reached():
+            item = heapq.heappop(self._queue)
+            request: _Request = item[-1]
+            if request.future.done():
+                continue
+            if self._is_user_limit_reached(request.user_id):
+                skipped.append(item)
+                continue
+            if not self._is_memory_available(request.memory):
+                skipped.append(item)
+                break
+            self._running += 1
+            self._running_memory += request.memory
+            self._running_per_user[request.user_id] = self._running_per_user.get(request.user_id, 0) + 1
+            self._virtual_time = max(self._virtual_time, request.start_tag)
+            request.future.set_result(None)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("admitted execution of '%s' user with %s priority, running: %s, waiting: %s, "
+                             "memory: %s", request.user_id, request.priority, self._running, len(self._queue),
+                             self._running_memory)
+        for item in skipped:
+            heapq.heappush(self._queue, item)
+        if not self._queue:
+            # nothing is waiting, tags from the past don't matter anymore
+            self._virtual_time = 0
+            self._user_finish_tags.clear()
+
+    def _is_limit_reached(self) -> bool:
+        return 0 < self._max_concurrent <= self._running
+
+    def _is_user_limit_reached(self, user_id: str) -> bool:
+        return 0 < self._max_concurrent_per_user <= self._running_per_user.get(user_id, 0)
+
+    def _is_memory_available(self, memory: int) -> bool:
+        return self._memory_budget <= 0 or self._running == 0 or self._running_memory + memory <= self._memory_budget
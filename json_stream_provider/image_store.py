@@ -0,0 +1,139 @@
+#  Copyright 2025 Exactpro (Exactpro Systems Limited)
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import hashlib
+import logging
+import os
+import stat
+import threading
+import uuid
+from pathlib import Path
+from typing import Dict, Tuple
+
+logger: logging.Logger = logging.getLogger('j-sp')
+
+CONTENT_DIR_NAME = '.content'
+IMAGE_EXTENSIONS = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.bmp'})
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+_MAX_CACHED_HASHES = 10_000
+_LINK_ATTEMPTS = 3
+
+
+class ImageStore:
+    """
+    Content-addressed storage of images produced by notebook runs.
+
+    Each unique content is stored once as `<images dir>/.content/<hash[:2]>/<hash><ext>`,
+    images written by runs become read-only hard links to the stored content, so run specific names stay valid.
+    Each run writes images into own directory, so an image is never overwritten after the run.
+    """
+
+    def __init__(self, images_dir: str):
+        self.images_dir = Path(images_dir).absolute()
+        self.content_dir = self.images_dir / CONTENT_DIR_NAME
+        self._hashes: Dict[Tuple[int, int, int, int], str] = {}
+        self._lock = threading.Lock()
+
+    def get_run_dir(self, run_name: str) -> str:
+        return str(self.images_dir / run_name)
+
+    def ingest(self, run_dir: str) -> int:
+        """
+        Links images written into the run directory to the stored content, removes the directory if it is empty.
+
+        Returns:
+            int: number of images whose content has already been stored
+        """
+        deduplicated = 0
+        for root, dirs, files in os.walk(run_dir):
+            for file_name in files:
+                path = Path(root) / file_name
+                if path.suffix.lower() not in IMAGE_EXTENSIONS:
+                    continue
+                try:
+                    if path.is_symlink() or path.stat().st_nlink > 1:
+                        continue
+                    if self._link(path):
+                        deduplicated += 1
+                except OSError as error:
+                    logger.warning("'%s' image isn't linked to content storage", path, exc_info=error)
+        try:
+            os.rmdir(run_dir)
+        except OSError:
+            # the directory contains files or doesn't exist
+            pass
+        return deduplicated
+
+    def get_hash(self, path: str, file_stat: os.stat_result) -> str:
+        key = (file_stat.st_dev, file_stat.st_ino, file_stat.st_size, file_stat.st_mtime_ns)
+        with self._lock:
+            content_hash = self._hashes.get(key)
+        if content_hash is None:
+            content_hash = _hash_file(path)
+            self._remember(key, content_hash)
+        return content_hash
+
+    @staticmethod
+    def is_stored(file_stat: os.stat_result) -> bool:
+        """Image linked to stored content can't be changed"""
+        return file_stat.st_nlink > 1
+
+    def _link(self, path: Path) -> bool:
+        content_hash = _hash_file(str(path))
+        content_path = self.content_dir / content_hash[:2] / (content_hash + path.suffix.lower())
+        for attempt in range(_LINK_ATTEMPTS):
+            content_path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                deduplicated = self._link_content(path, content_path)
+                break
+            except FileNotFoundError:
+                # empty shard directory or expired content is removed by cleanup concurrently
+                if attempt == _LINK_ATTEMPTS - 1 or not path.exists():
+                    raise
+        content_stat = content_path.stat()
+        self._remember((content_stat.st_dev, content_stat.st_ino, content_stat.st_size, content_stat.st_mtime_ns),
+                       content_hash)
+        return deduplicated
+
+    @staticmethod
+    def _link_content(path: Path, content_path: Path) -> bool:
+        try:
+            os.link(path, content_path)
+            os.chmod(content_path, content_path.stat().st_mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+            logger.debug("'%s' image is stored as '%s'", path, content_path)
+            return False
+        except FileExistsError:
+            # replace the copy by the link to the stored content atomically
+            temp_path = path.with_name(f'.{path.name}.{uuid.uuid4().hex}')
+            os.link(content_path, temp_path)
+            os.replace(temp_path, path)
+            # the stored content and its links share modification time which is used by cleanup
+            os.utime(content_path)
+            logger.debug("'%s' image is linked to '%s'", path, content_path)
+            return True
+
+    def _remember(self, key: Tuple[int, int, int, int], content_hash: str):
+        with self._lock:
+            if len(self._hashes) >= _MAX_CACHED_HASHES:
+                self._hashes.clear()
+            self._hashes[key] = content_hash
+
+
+def _hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        while chunk := file.read(_HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
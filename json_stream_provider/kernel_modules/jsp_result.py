@@ -0,0 +1,100 @@
+#  Copyright 2025 Exactpro (Exactpro Systems Limited)
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+"""
+Writes result records of a notebook executed by j-sp.
+
+The module is importable by notebooks executed by j-sp. Records are sent to j-sp over Jupyter comm,
+so j-sp serves them from memory without reading the file back. The file is written by j-sp in background.
+The records are written into the file directly when the notebook is executed outside of j-sp.
+
+Usage:
+    from jsp_result import ResultWriter
+
+    with ResultWriter(output_path) as writer:
+        writer.write({'a': 1})
+
+The module depends on standard library and `comm` package installed with ipykernel only.
+"""
+
+import json
+import os
+
+COMM_TARGET_NAME = 'j-sp.result'
+# j-sp sets the variable to the directory of results in kernels which it listens to
+CHANNEL_ENV_VARIABLE = 'JSP_RESULT_CHANNEL'
+
+DEFAULT_BATCH_SIZE = 1024 * 1024
+
+
+class ResultWriter:
+    """Writes JSONL records, records are sent by batches limited by the number of characters"""
+
+    def __init__(self, path: str, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.path = os.path.abspath(path)
+        self.batch_size = batch_size
+        self._lines = []
+        self._size = 0
+        self._comm = _open_comm(self.path)
+        self._file = None
+        if self._comm is None:
+            self._file = open(self.path, 'w')
+
+    def write(self, record):
+        self.write_line(json.dumps(record))
+
+    def write_line(self, line: str):
+        self._lines.append(line if line.endswith('\n') else line + '\n')
+        self._size += len(self._lines[-1])
+        if self._size >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._lines:
+            return
+        data = ''.join(self._lines)
+        self._lines = []
+        self._size = 0
+        if self._comm is not None:
+            self._comm.send({'path': self.path, 'data': data})
+        else:
+            self._file.write(data)
+            self._file.flush()
+
+    def close(self):
+        self.flush()
+        if self._comm is not None:
+            self._comm.send({'path': self.path, 'close': True})
+            self._comm.close()
+            self._comm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _open_comm(path: str):
+    results_dir = os.environ.get(CHANNEL_ENV_VARIABLE)
+    if not results_dir or not path.startswith(os.path.join(results_dir, '')):
+        return None
+    try:
+        from comm import create_comm
+        return create_comm(target_name=COMM_TARGET_NAME, data={'path': path})
+    except Exception:
+        return None
@@ -0,0 +1,152 @@
+#  Copyright 2025 Exactpro (Exactpro Systems Limited)
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import asyncio
+import logging
+import time
+from collections import deque
+from queue import Empty
+from typing import Deque, List, Optional, Set
+
+from jupyter_client import AsyncKernelManager, KernelClient
+from jupyter_core.utils import ensure_async
+
+logger: logging.Logger = logging.getLogger('engine')
+
+
+async def execute_silently(kc: KernelClient, code: str, timeout: float):
+    """Executes code in the kernel without outputs and history, raises RuntimeError when the code fails"""
+    msg_id = kc.execute(code, silent=True, store_history=False, allow_stdin=False)
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Kernel didn't respond in {timeout} sec")
+        try:
+            msg = await ensure_async(kc.shell_channel.get_msg(timeout=min(remaining, 1)))
+        except Empty:
+            continue
+        if msg['parent_header'].get('msg_id') == msg_id:
+            content = msg['content']
+            if content.get('status') != 'ok':
+                raise RuntimeError(f"{content.get('ename')}: {content.get('evalue')}")
+            return
+
+
+class KernelPool:
+    """
+    Pool of started kernels waiting for notebook executions. Configured modules are imported by each kernel
+    before it is put into the pool, so a new engine takes a ready kernel instead of starting and warming up a new one.
+    The pool is refilled in background when a kernel is taken.
+    """
+
+    def __init__(self, size: int = 0, preload_modules: List[str] = None, startup_timeout: float = 60):
+        self.size = size
+        self.preload_modules = preload_modules or []
+        self.startup_timeout = startup_timeout
+        self.kernel_name: Optional[str] = None
+        self._ready: Deque[AsyncKernelManager] = deque()
+        self._starting = 0
+        self._tasks: Set[asyncio.Task] = set()
+
+    def configure(self, size: int, preload_modules: List[str]):
+        self.size = max(size, 0)
+        self.preload_modules = list(preload_modules or [])
+
+    def start(self, kernel_name: str):
+        """Starts filling the pool by kernels with the passed name"""
+        self.kernel_name = kernel_name
+        self._fill()
+
+    def acquire(self, kernel_name: str) -> Optional[AsyncKernelManager]:
+        """Returns manager of a started kernel or None when the pool is empty"""
+        if kernel_name != self.kernel_name:
+            return None
+        km = None
+        while self._ready and km is None:
+            km = self._ready.popleft()
+            if not _is_alive(km):
+                logger.warning("Pooled kernel %s is dead, it is dropped", km.kernel_id)
+                self._drop(km)
+                km = None
+        if self.kernel_name is not None:
+            self._fill()
+        return km
+
+    async def shutdown(self):
+        self.size = 0
+        for task in list(self._tasks):
+            task.cancel()
+        while self._ready:
+            await self._shutdown_kernel(self._ready.popleft())
+
+    def _drop(self, km: AsyncKernelManager):
+        task = asyncio.ensure_future(self._shutdown_kernel(km))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _fill(self):
+        for _ in range(self.size - len(self._ready) - self._starting):
+            self._starting += 1
+            task = asyncio.ensure_future(self._start_kernel())
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _start_kernel(self):
+        km = AsyncKernelManager(kernel_name=self.kernel_name)
+        try:
+            start_time = time.monotonic()
+            await ensure_async(km.start_kernel())
+            kc = km.client()
+            kc.start_channels()
+            try:
+                await ensure_async(kc.wait_for_ready(timeout=self.startup_timeout))
+                if self.preload_modules:
+                    try:
+                        await execute_silently(kc, 'import ' + ', '.join(self.preload_modules), self.startup_timeout)
+                    except RuntimeError as error:
+                        # the kernel is still usable, notebook imports the module itself
+                        logger.warning("Pooled kernel %s can't import %s", km.kernel_id, self.preload_modules,
+                                       exc_info=error)
+            finally:
+                kc.stop_channels()
+            self._ready.append(km)
+            logger.info("Kernel %s is started for pool in %.3f sec", km.kernel_id, time.monotonic() - start_time)
+        except asyncio.CancelledError:
+            await self._shutdown_kernel(km)
+            raise
+        except Exception as error:
+            logger.error("Kernel for pool isn't started", exc_info=error)
+            await self._shutdown_kernel(km)
+        finally:
+            self._starting -= 1
+
+    @staticmethod
+    async def _shutdown_kernel(km: AsyncKernelManager):
+        try:
+            if km.has_kernel:
+                await ensure_async(km.shutdown_kernel(now=True))
+        except Exception as error:
+            logger.warning("Pooled kernel %s isn't shut down", km.kernel_id, exc_info=error)
+
+
+def _is_alive(km: AsyncKernelManager) -> bool:
+    """
+    Checks the kernel without awaiting, so the kernel is checked when it is taken by a client factory.
+    Process of local provisioner is polled, kernels of other provisioners are checked by engine health check.
+    """
+    if not km.has_kernel:
+        return False
+    process = getattr(km.provisioner, 'process', None)
+    return process is None or process.poll() is None
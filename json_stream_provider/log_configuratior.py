@@ -1,4 +1,4 @@
-#  Copyright 2024 Exactpro (Exactpro Systems Limited)
+#  Copyright 2024-2025 Exactpro (Exactpro Systems Limited)
 #
 #  Licensed under the Apache License, Version 2.0 (the "License");
 #  you may not use this file except in compliance with the License.
@@ -12,10 +12,18 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import atexit
 import logging.config
 import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Tuple
 
 log4py_file = '/var/th2/config/log4py.conf'
+# the listener writes queued records at exit, full queue is waited for free place up to this time
+LISTENER_STOP_TIMEOUT = 5
 
 
 def configure_logging():
@@ -25,6 +33,7 @@ def configure_logging():
     else:
         default_logging_config = {
             'version': 1,
+            'disable_existing_loggers': False,
             'formatters': {
                 'default': {
                     'format': '%(asctime)s.%(msecs)03d - %(name)s - %(levelname)s - %(message)s',
@@ -46,3 +55,122 @@ def configure_logging():
         }
         logging.config.dictConfig(default_logging_config)
         logging.getLogger(__name__).info('Logger is configured by default')
+
+
+def configure_async_logging(queue_size: int = 10000):
+    """
+    Moves handlers of configured loggers to background threads.
+
+    Records are put into a bounded queue per logger and are written by `QueueListener`,
+    so a slow output doesn't block the event loop. Records are dropped when the queue is full.
+    """
+    loggers = [logging.getLogger()] + [logger for logger in logging.Logger.manager.loggerDict.values()
+                                       if isinstance(logger, logging.Logger)]
+    for logger in loggers:
+        handlers = [handler for handler in logger.handlers if not isinstance(handler, DroppingQueueHandler)]
+        if not handlers:
+            continue
+        records = queue.Queue(maxsize=max(queue_size, 0))
+        listener = BlockingStopQueueListener(records, *handlers, respect_handler_level=True)
+        for handler in handlers:
+            logger.removeHandler(handler)
+        logger.addHandler(DroppingQueueHandler(records))
+        listener.start()
+        atexit.register(stop_listener, listener)
+    logging.getLogger(__name__).info('Logger handlers are moved to background threads, queue size: %d', queue_size)
+
+
+def stop_listener(listener: QueueListener):
+    try:
+        listener.stop()
+    except queue.Full:
+        # the listener doesn't write records, so the rest of them are lost
+        pass
+
+
+class BlockingStopQueueListener(QueueListener):
+    """
+    Waits for free place in the full queue to put the stop sentinel, `QueueListener` fails in this case,
+    so the listener isn't joined and queued records are lost.
+    """
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel, timeout=LISTENER_STOP_TIMEOUT)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """Puts records into bounded queue without waiting, records which don't fit are counted and dropped"""
+
+    def __init__(self, records: queue.Queue):
+        super().__init__(records)
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def emit(self, record: logging.LogRecord):
+        if self.dropped:
+            self._report_dropped()
+        super().emit(record)
+
+    def _report_dropped(self):
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+        record = logging.LogRecord(__name__, logging.WARNING, __file__, 0,
+                                   '%d log records are dropped because logging queue is full', (dropped,), None)
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += dropped
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limits number of records with the same message template per second.
+    Suppressed records are counted and the number is added to the next passed record.
+    """
+
+    def __init__(self, rate: float = 1, burst: int = 5):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        # message template -> (tokens, last update time, suppressed records)
+        self._buckets: Dict[Tuple[str, str], List] = {}
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate: float, burst: int = None):
+        with self._lock:
+            self.rate = rate
+            if burst is not None:
+                self.burst = burst
+            self._buckets.clear()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0:
+            return True
+        key = (record.name, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= 1000:
+                    self._buckets.clear()
+                bucket = self._buckets[key] = [self.burst, now, 0]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                return False
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+        if suppressed and isinstance(record.args, tuple):
+            msg = str(record.msg) if record.args else str(record.msg).replace('%', '%%')
+            record.msg = msg + ' (%d similar records suppressed)'
+            record.args = record.args + (suppressed,)
+        return True
@@ -0,0 +1,155 @@
+#  Copyright 2025 Exactpro (Exactpro Systems Limited)
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import locale
+import logging
+import mmap
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+logger: logging.Logger = logging.getLogger('j-sp')
+
+
+class MappedFile:
+    """
+    Read-only memory map of a file. Readers of the same file share the page cache instead of
+    keeping private copies of the content.
+    Only final files which are never written or truncated again should be mapped, access to pages
+    of a truncated file kills the process by SIGBUS. Removal of the mapped file is safe.
+    """
+
+    def __init__(self, path: str, stat: os.stat_result):
+        self.path = path
+        self.mtime_ns = stat.st_mtime_ns
+        self.size = stat.st_size
+        self._lock = threading.Lock()
+        self._line_offsets: Optional[array] = None
+        if self.size > 0:
+            with open(path, 'rb') as file:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            # empty file can't be mapped
+            self._map = None
+
+    def is_actual(self, stat: os.stat_result) -> bool:
+        return self.mtime_ns == stat.st_mtime_ns and self.size == stat.st_size
+
+    def view(self, start: int = 0, end: Optional[int] = None) -> memoryview:
+        """Returns memoryview slice of the content without copying. The view must be released after usage"""
+        if self._map is None:
+            return memoryview(b'')
+        return memoryview(self._map)[start:end]
+
+    def read_text(self, start: int = 0, end: Optional[int] = None) -> str:
+        """Decodes the content the same way as a file opened in text mode with universal new lines"""
+        with self.view(start, end) as view:
+            text = str(view, locale.getpreferredencoding(False))
+        return text.replace('\r\n', '\n').replace('\r', '\n')
+
+    def count_lines(self) -> int:
+        return len(self._get_line_offsets()) - 1
+
+    def read_lines(self, offset: int = 0, limit: Optional[int] = None) -> str:
+        """Returns text of lines range, line offsets are indexed once per map"""
+        return self.read_text(*self.get_lines_bounds(offset, limit))
+
+    def get_lines_bounds(self, offset: int = 0, limit: Optional[int] = None) -> Tuple[int, int]:
+        """Returns start and end byte positions of lines range"""
+        line_offsets = self._get_line_offsets()
+        lines = len(line_offsets) - 1
+        first = min(max(offset, 0), lines)
+        last = lines if limit is None else min(first + max(limit, 0), lines)
+        return line_offsets[first], line_offsets[last]
+
+    def _get_line_offsets(self) -> array:
+        with self._lock:
+            if self._line_offsets is None:
+                line_offsets = array('Q', [0])
+                if self._map is not None:
+                    position = self._map.find(b'\n')
+                    while position >= 0:
+                        line_offsets.append(position + 1)
+                        position = self._map.find(b'\n', position + 1)
+                    if line_offsets[-1] != self.size:
+                        # the last line doesn't end with new line
+                        line_offsets.append(self.size)
+                self._line_offsets = line_offsets
+            return self._line_offsets
+
+
+class MappedFilePool:
+    """
+    Pool of open memory maps limited by number of files. A map is replaced when modification time
+    or size of the file changes, the least recently used map is dropped when the pool is full.
+    """
+
+    def __init__(self, max_size: int = 64):
+        self._max_size = max_size
+        self._maps: OrderedDict[str, MappedFile] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def set_max_size(self, max_size: int):
+        with self._lock:
+            self._max_size = max_size
+            self._evict()
+
+    def get(self, path: str) -> MappedFile:
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            mapped_file = self._maps.get(path)
+            if mapped_file is not None:
+                if mapped_file.is_actual(stat):
+                    self._maps.move_to_end(path)
+                    return mapped_file
+                logger.debug("'%s' file is changed, remap it", path)
+                del self._maps[path]
+            mapped_file = MappedFile(path, stat)
+            if self._max_size > 0:
+                self._maps[path] = mapped_file
+                self._evict()
+            return mapped_file
+
+    def clear(self):
+        with self._lock:
+            self._maps.clear()
+
+    def _evict(self):
+        # maps aren't closed explicitly because concurrent readers can still use them,
+        # a map is unmapped when the last reference is dropped
+        while len(self._maps) > max(self._max_size, 0):
+            self._maps.popitem(last=False)
+
+
+def read_file_text(path: str) -> str:
+    """Reads the file by plain read, it's used for files which can still be written"""
+    with open(path, 'r') as file:
+        return file.read()
+
+
+def read_file_lines(path: str, offset: int = 0, limit: Optional[int] = None) -> Tuple[str, int]:
+    """Reads lines range of the file by plain read, returns text of the range and total number of lines"""
+    first = max(offset, 0)
+    last = None if limit is None else first + max(limit, 0)
+    lines = []
+    total_lines = 0
+    with open(path, 'r') as file:
+        for line in file:
+            if first <= total_lines and (last is None or total_lines < last):
+                lines.append(line)
+            total_lines += 1
+    return ''.join(lines), total_lines
@@ -0,0 +1,155 @@
+#  Copyright 2025 Exactpro (Exactpro Systems Limited)
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import ast
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import nbformat
+from IPython.core.inputtransformer2 import TransformerManager
+
+from json_stream_provider.custom_python_translator import CustomPythonTranslator
+
+logger: logging.Logger = logging.getLogger('j-sp')
+
+REQUIRED_PARAMETERS = ('output_path',)
+
+# cells are compiled to bytecode, because errors like `return` outside function are raised by compiler only
+_COMPILE_FLAGS = ast.PyCF_ALLOW_TOP_LEVEL_AWAIT
+
+
+class NotebookVerdict:
+    def __init__(self, errors: List[str], parameters: List[str], warnings: Optional[List[str]] = None):
+        self.errors = errors
+        self.parameters = parameters
+        # problems which don't prevent execution
+        self.warnings = warnings or []
+
+    def is_valid(self) -> bool:
+        return not self.errors
+
+    def __str__(self):
+        # the verdict is used as a single line reason of response
+        return ' '.join('; '.join(self.errors).split()) if self.errors else 'valid'
+
+
+class NotebookValidator:
+    """
+    Checks notebooks before execution: the notebook is readable, the parameters cell declares
+    required parameters and python code cells are compiled without syntax errors.
+    Notebook without parameters cell is valid, papermill injects parameters at the top of such notebook.
+    Verdicts are cached until modification time or size of the notebook is changed.
+    """
+
+    def __init__(self):
+        self._verdicts: Dict[str, Tuple[Tuple[int, int], NotebookVerdict]] = {}
+        self._lock = threading.Lock()
+        # transformer isn't thread safe
+        self._transformer_lock = threading.Lock()
+        self._transformer = TransformerManager()
+
+    def get(self, path: str) -> Optional[NotebookVerdict]:
+        """Returns cached verdict of the actual notebook or None"""
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._verdicts.get(path)
+        if cached is not None and cached[0] == (stat.st_mtime_ns, stat.st_size):
+            return cached[1]
+        return None
+
+    def validate(self, path: str) -> NotebookVerdict:
+        path = os.path.abspath(path)
+        verdict = self.get(path)
+        if verdict is not None:
+            return verdict
+        stat = os.stat(path)
+        verdict = self._check(path)
+        with self._lock:
+            self._verdicts[path] = ((stat.st_mtime_ns, stat.st_size), verdict)
+        if not verdict.is_valid():
+            logger.warning("'%s' notebook is invalid: %s", path, verdict)
+        for warning in verdict.warnings:
+            logger.warning("'%s' notebook: %s", path, warning)
+        return verdict
+
+    def scan(self, notebooks_dir: str) -> int:
+        """Validates notebooks of the directory recursively, returns number of invalid notebooks"""
+        invalid = 0
+        paths = set()
+        for root, dirs, files in os.walk(notebooks_dir):
+            dirs[:] = [name for name in dirs if not name.startswith('.')]
+            for file_name in files:
+                if not file_name.endswith('.ipynb'):
+                    continue
+                path = os.path.abspath(os.path.join(root, file_name))
+                paths.add(path)
+                try:
+                    if not self.validate(path).is_valid():
+                        invalid += 1
+                except OSError:
+                    # the notebook is removed during the scan
+                    continue
+        with self._lock:
+            # verdicts of removed notebooks aren't needed anymore
+            for path in [path for path in self._verdicts if path not in paths]:
+                del self._verdicts[path]
+        logger.info("%d notebooks are validated in '%s', %d are invalid", len(paths), notebooks_dir, invalid)
+        return invalid
+
+    def _check(self, path: str) -> NotebookVerdict:
+        try:
+            nb = nbformat.read(path, as_version=4)
+        except Exception as error:
+            return NotebookVerdict([f"Notebook read failed: {type(error).__name__}: {error}"], [])
+
+        errors = []
+        warnings = []
+        parameters_cell = next((cell for cell in nb.cells if 'parameters' in cell.get('metadata', {}).get('tags', [])),
+                               None)
+        parameters = []
+        if parameters_cell is None:
+            warnings.append('notebook has no cell tagged parameters, parameters are injected at the top')
+        else:
+            parameters = [parameter.name for parameter in CustomPythonTranslator.inspect(parameters_cell)]
+            missing = [name for name in REQUIRED_PARAMETERS if name not in parameters]
+            if missing:
+                errors.append(f"Parameters cell doesn't define {', '.join(missing)}")
+
+        language = nb.metadata.get('kernelspec', {}).get('language') or nb.metadata.get('language_info', {}).get('name')
+        if language in (None, 'python'):
+            for index, cell in enumerate(nb.cells):
+                if cell.cell_type != 'code':
+                    continue
+                error = self._compile(cell.source, index)
+                if error is not None:
+                    errors.append(error)
+        return NotebookVerdict(errors, parameters, warnings)
+
+    def _compile(self, source: str, index: int) -> Optional[str]:
+        try:
+            # IPython syntax like magics and shell commands is transformed to python code as kernel does
+            with self._transformer_lock:
+                code = self._transformer.transform_cell(source)
+            compile(code, f'<cell {index}>', 'exec', flags=_COMPILE_FLAGS, dont_inherit=True)
+            return None
+        except SyntaxError as error:
+            return f"Cell {index} has syntax error at line {error.lineno}: {error.msg}"
+        except Exception as error:
+            return f"Cell {index} isn't compiled: {type(error).__name__}: {error}"
@@ -11,6 +11,7 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
+import copy
 from logging import INFO
 from pathlib import Path
 
@@ -76,6 +77,7 @@ async def async_execute_notebook(
     start_timeout=60,
     report_mode=False,
     cwd=None,
+    nb_template=None,
     **engine_kwargs,
 ):
     """Executes a single notebook locally.
@@ -112,6 +114,8 @@ async def async_execute_notebook(
         Flag for whether or not to hide input.
     cwd : str or Path, optional
         Working directory to use when executing the notebook
+    nb_template : nbformat.NotebookNode, optional
+        Already loaded notebook of `input_path`, it is copied instead of reading the notebook file
     **kwargs
         Arbitrary keyword arguments to pass to the notebook engine
 
@@ -139,7 +143,7 @@ async def async_execute_notebook(
             if logger.isEnabledFor(INFO):
                 logger.info(f"Working directory: {get_pretty_path(cwd)}")
 
-        nb = load_notebook_node(input_path)
+        nb = copy.deepcopy(nb_template) if nb_template is not None else load_notebook_node(input_path)
 
         # Parameterize the Notebook.
         if parameters:
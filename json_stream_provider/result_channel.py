@@ -0,0 +1,225 @@
+#  Copyright 2025 Exactpro (Exactpro Systems Limited)
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import logging
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+
+logger: logging.Logger = logging.getLogger('j-sp')
+
+# comm target used by jsp_result module in the kernel
+COMM_TARGET_NAME = 'j-sp.result'
+# directory of modules which are importable by notebooks executed by j-sp
+KERNEL_MODULES_DIR = str(Path(__file__).absolute().parent / 'kernel_modules')
+
+
+class ResultBuffer:
+    """
+    Result records received from the kernel. Records are kept in memory until the buffer is evicted,
+    the file is written in background in the same order.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.created_time_ns = time.time_ns()
+        self.size = 0
+        self.closed = False
+        # records aren't kept in memory when the buffer doesn't fit into memory limit
+        self.spilled = False
+        self.persisted: Future = Future()
+        self._chunks: List[str] = []
+        self._text: Optional[str] = None
+        self._line_offsets: Optional[array] = None
+        self._stat_key = None
+        self._lock = threading.Lock()
+
+    def read_text(self) -> str:
+        with self._lock:
+            if self._text is None:
+                self._text = ''.join(self._chunks)
+                self._chunks = [self._text]
+            return self._text
+
+    def count_lines(self) -> int:
+        return len(self._get_line_offsets()) - 1
+
+    def read_lines(self, offset: int = 0, limit: Optional[int] = None) -> str:
+        line_offsets = self._get_line_offsets()
+        lines = len(line_offsets) - 1
+        first = min(max(offset, 0), lines)
+        last = lines if limit is None else min(first + max(limit, 0), lines)
+        return self.read_text()[line_offsets[first]:line_offsets[last]]
+
+    def _get_line_offsets(self) -> array:
+        text = self.read_text()
+        with self._lock:
+            if self._line_offsets is None:
+                line_offsets = array('Q', [0])
+                position = text.find('\n')
+                while position >= 0:
+                    line_offsets.append(position + 1)
+                    position = text.find('\n', position + 1)
+                if line_offsets[-1] != len(text):
+                    line_offsets.append(len(text))
+                self._line_offsets = line_offsets
+            return self._line_offsets
+
+
+class ResultChannel:
+    """
+    In-memory results sent by notebooks over `j-sp.result` comm. Each result is served from memory as soon as
+    the notebook closes it and is written into the file by single background thread. Memory is limited by
+    total size of buffers, the oldest written buffers are evicted first, a buffer which doesn't fit is served
+    from the file after it is written.
+    """
+
+    def __init__(self, results_dir: str = None, max_size: int = 64 * 1024 * 1024):
+        self.results_dir = results_dir
+        self.max_size = max_size
+        self._buffers: OrderedDict[str, ResultBuffer] = OrderedDict()
+        self._memory_size = 0
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='result-writer')
+
+    def configure(self, results_dir: str, max_size: int):
+        self.results_dir = os.path.abspath(results_dir) if results_dir else None
+        self.max_size = max_size
+
+    def is_enabled(self) -> bool:
+        return self.results_dir is not None and self.max_size > 0
+
+    def accepts(self, path: str) -> bool:
+        """Results are accepted into the results directory only"""
+        return self.is_enabled() and os.path.abspath(path).startswith(os.path.join(self.results_dir, ''))
+
+    def open(self, path: str) -> ResultBuffer:
+        path = os.path.abspath(path)
+        buffer = ResultBuffer(path)
+        with self._lock:
+            self._drop(path)
+            self._buffers[path] = buffer
+        self._writer.submit(self._write, buffer, None)
+        return buffer
+
+    def append(self, path: str, data: str):
+        path = os.path.abspath(path)
+        buffer = self._buffers.get(path)
+        if buffer is None or buffer.closed:
+            buffer = self.open(path)
+        encoded = data.encode()
+        self._writer.submit(self._write, buffer, encoded)
+        with self._lock:
+            buffer.size += len(encoded)
+            if not buffer.spilled:
+                buffer._chunks.append(data)
+                self._memory_size += len(encoded)
+                self._evict(buffer)
+
+    def close(self, path: str) -> Optional[ResultBuffer]:
+        buffer = self._buffers.get(os.path.abspath(path))
+        if buffer is not None and not buffer.closed:
+            buffer.closed = True
+            self._writer.submit(self._persist, buffer)
+        return buffer
+
+    def get(self, path: str) -> Optional[ResultBuffer]:
+        """Returns closed buffer which content is kept in memory and matches the file"""
+        path = os.path.abspath(path)
+        with self._lock:
+            buffer = self._buffers.get(path)
+            if buffer is None or not buffer.closed or buffer.spilled:
+                return None
+            if buffer.persisted.done() and buffer._stat_key is not None:
+                # the file is changed or removed, for example, by cleanup
+                try:
+                    stat = os.stat(path)
+                    actual = (stat.st_size, stat.st_mtime_ns) == buffer._stat_key
+                except OSError:
+                    actual = False
+                if not actual:
+                    self._drop(path)
+                    return None
+            self._buffers.move_to_end(path)
+            return buffer
+
+    def contains(self, path: str) -> bool:
+        return os.path.abspath(path) in self._buffers
+
+    def wait_persisted(self, path: str, timeout: float = None) -> bool:
+        """
+        Waits until the result sent by notebook is written into the file, returns False when writing failed.
+        Raises TimeoutError when the result isn't written in time.
+        """
+        buffer = self._buffers.get(os.path.abspath(path))
+        if buffer is None or not buffer.closed:
+            return True
+        return buffer.persisted.exception(timeout) is None
+
+    def _evict(self, current: ResultBuffer):
+        # written buffers are evicted before the buffer which is being received
+        for path in [path for path, buffer in self._buffers.items() if _is_written(buffer)]:
+            if self._memory_size <= self.max_size:
+                return
+            self._drop(path)
+        if self._memory_size > self.max_size:
+            logger.info("'%s' result doesn't fit into memory, it will be served from file", current.path)
+            self._memory_size -= current.size
+            current.spilled = True
+            current._chunks = []
+
+    def _drop(self, path: str):
+        buffer = self._buffers.pop(path, None)
+        if buffer is not None and not buffer.spilled:
+            self._memory_size -= buffer.size
+
+    @staticmethod
+    def _write(buffer: ResultBuffer, data: Optional[bytes]):
+        if buffer.persisted.done():
+            return
+        try:
+            if data is None:
+                Path(buffer.path).parent.mkdir(parents=True, exist_ok=True)
+                open(buffer.path, 'wb').close()
+            else:
+                with open(buffer.path, 'ab') as file:
+                    file.write(data)
+        except OSError as error:
+            logger.error("'%s' result isn't written", buffer.path, exc_info=error)
+            buffer.persisted.set_exception(error)
+
+    def _persist(self, buffer: ResultBuffer):
+        if buffer.persisted.done():
+            return
+        try:
+            stat = os.stat(buffer.path)
+            buffer._stat_key = (stat.st_size, stat.st_mtime_ns)
+            buffer.persisted.set_result(None)
+            logger.debug("'%s' result is written, %d bytes", buffer.path, buffer.size)
+        except OSError as error:
+            logger.error("'%s' result isn't written", buffer.path, exc_info=error)
+            buffer.persisted.set_exception(error)
+        if buffer.spilled:
+            with self._lock:
+                if self._buffers.get(buffer.path) is buffer:
+                    del self._buffers[buffer.path]
+
+
+def _is_written(buffer: ResultBuffer) -> bool:
+    return buffer.persisted.done() and buffer.persisted.exception() is None
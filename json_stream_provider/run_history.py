@@ -0,0 +1,119 @@
+#  Copyright 2025 Exactpro (Exactpro Systems Limited)
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import json
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+logger: logging.Logger = logging.getLogger('j-sp')
+
+RUN_HISTORY_FILE_NAME = 'run-history.json'
+
+
+class RunRecord:
+    """Measurements of a successful notebook execution"""
+    __slots__ = ('finished', 'duration', 'result_size', 'peak_rss')
+
+    def __init__(self, finished: float, duration: float, result_size: Optional[int], peak_rss: Optional[int]):
+        self.finished = finished
+        self.duration = duration
+        self.result_size = result_size
+        self.peak_rss = peak_rss
+
+    def to_list(self) -> list:
+        return [self.finished, self.duration, self.result_size, self.peak_rss]
+
+    @classmethod
+    def from_list(cls, values: list) -> 'RunRecord':
+        return cls(*values[:4])
+
+
+class RunHistory:
+    """
+    Ring buffer of the recent successful executions of each notebook. The history is kept in memory
+    and saved into JSON file, so estimations survive restart.
+    """
+
+    def __init__(self, max_runs: int = 20, path: str = None):
+        self.max_runs = max_runs
+        self.path = path
+        self._records: Dict[str, Deque[RunRecord]] = {}
+        self._lock = threading.Lock()
+        self._changed = False
+
+    def configure(self, max_runs: int, path: Optional[str]):
+        with self._lock:
+            self.max_runs = max(max_runs, 1)
+            self.path = path
+            self._records = {notebook: deque(records, maxlen=self.max_runs)
+                             for notebook, records in self._records.items()}
+
+    def load(self):
+        if not self.path or not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, 'r') as file:
+                data = json.load(file)
+            with self._lock:
+                for notebook, records in data.items():
+                    self._records[notebook] = deque((RunRecord.from_list(values) for values in records),
+                                                    maxlen=self.max_runs)
+            logger.info("run history of %d notebooks is loaded from '%s'", len(data), self.path)
+        except Exception as error:
+            logger.warning("run history isn't loaded from '%s'", self.path, exc_info=error)
+
+    def save(self):
+        """Writes the history into the file atomically if it is changed since the last save"""
+        with self._lock:
+            if not self.path or not self._changed:
+                return
+            data = {notebook: [record.to_list() for record in records] for notebook, records in self._records.items()}
+            self._changed = False
+        temp_path = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            with open(temp_path, 'w') as file:
+                json.dump(data, file)
+            os.replace(temp_path, self.path)
+        except OSError as error:
+            logger.warning("run history isn't saved into '%s'", self.path, exc_info=error)
+
+    def add(self, notebook: str, duration: float, result_size: Optional[int] = None, peak_rss: Optional[int] = None):
+        with self._lock:
+            records = self._records.get(notebook)
+            if records is None:
+                records = self._records[notebook] = deque(maxlen=self.max_runs)
+            records.append(RunRecord(time.time(), duration, result_size, peak_rss))
+            self._changed = True
+
+    def estimate(self, notebook: str) -> Optional[float]:
+        """Returns median duration of the recent executions or None when the notebook hasn't been executed"""
+        durations = self._get_values(notebook, 'duration')
+        return statistics.median(durations) if durations else None
+
+    def estimate_peak_rss(self, notebook: str) -> Optional[int]:
+        """Returns the highest peak memory of kernel among the recent executions or None when it is unknown"""
+        values = self._get_values(notebook, 'peak_rss')
+        return max(values) if values else None
+
+    def _get_values(self, notebook: str, attribute: str) -> List:
+        with self._lock:
+            records = self._records.get(notebook)
+            if not records:
+                return []
+            return [value for value in (getattr(record, attribute) for record in records) if value is not None]
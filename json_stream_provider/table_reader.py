@@ -0,0 +1,147 @@
+#  Copyright 2025 Exactpro (Exactpro Systems Limited)
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+from typing import Iterator, List, Optional
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+ARROW_MAGIC = b'ARROW1'
+PARQUET_MAGIC = b'PAR1'
+
+
+class TableSlice:
+    """
+    Memory-mapped rows range of Arrow IPC file or Parquet file with selected columns.
+    Data of Arrow IPC file isn't copied until it is serialized.
+    """
+
+    def __init__(self, path: str, offset: int = 0, limit: Optional[int] = None, columns: List[str] = None):
+        self.path = path
+        self.offset = max(offset, 0)
+        self.limit = limit
+        self.columns = columns or None
+        with open(path, 'rb') as file:
+            magic = file.read(len(ARROW_MAGIC))
+        if magic.startswith(ARROW_MAGIC):
+            self._reader = _ArrowFileReader(path)
+        elif magic.startswith(PARQUET_MAGIC):
+            self._reader = _ParquetFileReader(path)
+        else:
+            raise ValueError(f"'{path}' file is neither Arrow IPC file nor Parquet file")
+        self.total_rows: int = self._reader.num_rows
+        schema = self._reader.schema
+        if self.columns is not None:
+            unknown = [column for column in self.columns if column not in schema.names]
+            if unknown:
+                raise ValueError(f"'{path}' file doesn't contain {unknown} columns")
+            schema = pa.schema([schema.field(column) for column in self.columns])
+        self.schema: pa.Schema = schema
+
+    def batches(self) -> Iterator[pa.RecordBatch]:
+        end = self.total_rows if self.limit is None else min(self.total_rows, self.offset + max(self.limit, 0))
+        for batch_offset, batch in self._reader.batches(self.offset, end, self.columns):
+            start = max(self.offset - batch_offset, 0)
+            stop = min(end - batch_offset, batch.num_rows)
+            if stop > start:
+                yield batch.slice(start, stop - start)
+
+    def to_ipc_stream(self) -> Iterator[bytes]:
+        """Serializes the slice to Arrow IPC stream format chunk by chunk"""
+        sink = _ChunkSink()
+        with ipc.new_stream(sink, self.schema) as writer:
+            yield sink.drain()
+            for batch in self.batches():
+                writer.write_batch(batch)
+                yield sink.drain()
+        yield sink.drain()
+
+    def to_pylist(self) -> dict:
+        rows = []
+        for batch in self.batches():
+            rows.extend(zip(*(column.to_pylist() for column in batch.columns)))
+        return {'columns': self.schema.names, 'rows': [list(row) for row in rows], 'total_rows': self.total_rows,
+                'offset': self.offset}
+
+    def close(self):
+        self._reader.close()
+
+
+class _ArrowFileReader:
+    def __init__(self, path: str):
+        self._source = pa.memory_map(path, 'r')
+        self._reader = ipc.open_file(self._source)
+        self.schema = self._reader.schema
+        self.num_rows = sum(self._reader.get_batch(i).num_rows for i in range(self._reader.num_record_batches))
+
+    def batches(self, start: int, end: int, columns: Optional[List[str]]):
+        batch_offset = 0
+        for i in range(self._reader.num_record_batches):
+            if batch_offset >= end:
+                break
+            batch = self._reader.get_batch(i)
+            if batch_offset + batch.num_rows > start:
+                yield batch_offset, batch.select(columns) if columns is not None else batch
+            batch_offset += batch.num_rows
+
+    def close(self):
+        self._source.close()
+
+
+class _ParquetFileReader:
+    def __init__(self, path: str):
+        self._file = pq.ParquetFile(path, memory_map=True)
+        self.schema = self._file.schema_arrow
+        self.num_rows = self._file.metadata.num_rows
+
+    def batches(self, start: int, end: int, columns: Optional[List[str]]):
+        batch_offset = 0
+        for i in range(self._file.num_row_groups):
+            if batch_offset >= end:
+                break
+            group_rows = self._file.metadata.row_group(i).num_rows
+            # only row groups overlapping the requested range are read
+            if batch_offset + group_rows > start:
+                for batch in self._file.read_row_group(i, columns=columns).to_batches():
+                    yield batch_offset, batch
+                    batch_offset += batch.num_rows
+            else:
+                batch_offset += group_rows
+
+    def close(self):
+        self._file.close()
+
+
+class _ChunkSink:
+    """File-like object collecting written data until it is drained"""
+
+    def __init__(self):
+        self._chunks = []
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
@@ -5,14 +5,24 @@
 #  All rights reserved.
 #  This is unpublished, licensed software, confidential and proprietary
 #  information which is the property of Exactpro Systems LLC or its licensors.
+import hashlib
 import logging
 import subprocess
 import venv
 from pathlib import Path
+from typing import Optional
+
+from jupyter_client.kernelspec import KernelSpecManager, NoSuchKernel
 
 logger: logging.Logger = logging.getLogger('j-sp')
 
+KERNEL_MARKER_FILE = '.j-sp-kernel-marker'
+
 def register_kernel(venv_dir: Path, kernel_name: str, kernel_display_name: str):
+    if _is_kernel_registered(venv_dir, kernel_name, kernel_display_name):
+        logger.info("reuse '%s' kernel registered using '%s' virtual environment", kernel_name, venv_dir)
+        return
+
     _create_venv_if_needed(venv_dir)
     result = subprocess.run(
         [
@@ -31,6 +41,7 @@ def register_kernel(venv_dir: Path, kernel_name: str, kernel_display_name: str):
     if result.returncode == 0:
         logger.info(
             "created '%s' kernel using '%s' virtual environment",kernel_name, venv_dir)
+        _write_kernel_marker(venv_dir, kernel_name, kernel_display_name)
     else:
         raise RuntimeError(
             f"creation '{kernel_name}' kernel using '{venv_dir}' virtual environment failure: {result.stdout.strip()}")
@@ -40,4 +51,36 @@ def _create_venv_if_needed(venv_dir: Path):
         logger.info('reuse %s virtual env', venv_dir)
         return
     venv.create(venv_dir, with_pip=True, system_site_packages=True)
-    logger.info('created %s virtual env', venv_dir)
\ No newline at end of file
+    logger.info('created %s virtual env', venv_dir)
+
+def _is_kernel_registered(venv_dir: Path, kernel_name: str, kernel_display_name: str) -> bool:
+    kernel_dir = _find_kernel_dir(kernel_name)
+    if kernel_dir is None or not (kernel_dir / "kernel.json").is_file() or not (venv_dir / "bin" / "python").exists():
+        return False
+    marker_path = kernel_dir / KERNEL_MARKER_FILE
+    if not marker_path.is_file():
+        return False
+    return marker_path.read_text().strip() == _kernel_hash(kernel_dir, venv_dir, kernel_name, kernel_display_name)
+
+def _write_kernel_marker(venv_dir: Path, kernel_name: str, kernel_display_name: str):
+    kernel_dir = _find_kernel_dir(kernel_name)
+    if kernel_dir is None:
+        logger.warning("'%s' kernel isn't found after registration", kernel_name)
+        return
+    marker_path = kernel_dir / KERNEL_MARKER_FILE
+    marker_path.write_text(_kernel_hash(kernel_dir, venv_dir, kernel_name, kernel_display_name))
+
+def _find_kernel_dir(kernel_name: str) -> Optional[Path]:
+    try:
+        return Path(KernelSpecManager().get_kernel_spec(kernel_name).resource_dir)
+    except NoSuchKernel:
+        return None
+
+def _kernel_hash(kernel_dir: Path, venv_dir: Path, kernel_name: str, kernel_display_name: str) -> str:
+    # the kernel spec and the registration arguments are covered, the spec is rewritten by each registration
+    digest = hashlib.sha256()
+    digest.update(str(venv_dir.absolute()).encode())
+    digest.update(kernel_name.encode())
+    digest.update(kernel_display_name.encode())
+    digest.update((kernel_dir / "kernel.json").read_bytes())
+    return digest.hexdigest()
@@ -13,57 +13,100 @@
 #  limitations under the License.
 
 import asyncio
+import hashlib
 import json
 import logging.config
+import math
+import mimetypes
 import os
+import shutil
+import sys
 from argparse import ArgumentParser
 from asyncio import Task
 from datetime import datetime, timezone, timedelta
 from enum import Enum
 from logging import INFO, DEBUG
 from pathlib import Path
-from typing import Coroutine, Any, Union
+from typing import Coroutine, Any, Dict, Iterator, Tuple, Union, Optional
 from uuid import uuid4
 
 import papermill as pm
-from aiohttp import web
+from aiohttp import web, hdrs
 from aiohttp.web_exceptions import HTTPNotFound, HTTPInternalServerError
-from aiohttp.web_fileresponse import FileResponse
+from aiohttp.helpers import ETAG_ANY
 from aiohttp.web_middlewares import middleware
 from aiohttp.web_request import Request
 from aiohttp.web_response import Response
 from aiohttp_swagger import *
 from aiojobs import Job
 from aiojobs.aiohttp import setup
+from papermill.iorw import load_notebook_node
 from papermill.utils import chdir
 
 from json_stream_provider import papermill_execute_ext as epm
+from json_stream_provider.cleanup import CleanupEngine, CleanupTarget
 from json_stream_provider.custom_engines import CustomEngine, EngineBusyError
 from json_stream_provider.custom_python_translator import CustomPythonTranslator
+from json_stream_provider.disk_quota import DiskQuota, LOW_WATERMARK, POLICY_EVICT, POLICY_REFUSE
 from json_stream_provider.error_utils import prepare_response_error
-from json_stream_provider.log_configuratior import configure_logging
+from json_stream_provider.execution_scheduler import ExecutionScheduler, DEFAULT_PRIORITY
+from json_stream_provider.image_store import ImageStore
+from json_stream_provider.log_configuratior import configure_logging, configure_async_logging, RateLimitFilter
+from json_stream_provider.mapped_files import MappedFilePool, read_file_lines, read_file_text
+from json_stream_provider.notebook_validator import NotebookValidator
+from json_stream_provider.result_channel import ResultChannel
+from json_stream_provider.run_history import RunHistory, RUN_HISTORY_FILE_NAME
+from json_stream_provider.table_reader import TableSlice
 from json_stream_provider.papermill_execute_ext import DEFAULT_ENGINE_USER_ID
 from json_stream_provider.virtual_environment import register_kernel
 
 ENGINE_USER_ID_COOKIE_KEY = 'engine_user_id'
 
-os.system('pip list')
-
 server_status: str = 'ok'
 notebooks_dir: str = '/home/jupyter-notebook/'
 results_dir: str = '/home/jupyter-notebook/results/'
 results_images_dir: str = '/home/jupyter-notebook/results/images/'
 log_dir: str = '/home/jupyter-notebook/logs/'
 cleanup_horizon: timedelta = timedelta(weeks=2)
+# bytes, zero value disables the quota of directory
+results_quota: int = 0
+results_images_quota: int = 0
+logs_quota: int = 0
+disk_quota: DiskQuota = DiskQuota()
+cleanup_engine: CleanupEngine = CleanupEngine()
+cleanup_task: Optional[Task] = None
 venv_dir: str = '/home/json-stream/.venv'
 kernel_name: str = '.venv'
+cell_execution_timeout: int = -1
 
 tasks: dict = {}
+batches: dict = {}
+max_batch_parallelism: int = 4
+execution_scheduler: ExecutionScheduler = ExecutionScheduler()
+kernel_registration: Optional[Task[None]] = None
+background_tasks: set = set()
+MAX_LONG_POLL_TIME: float = 60
+# bounds of polling interval suggested to clients by Retry-After
+MIN_RETRY_AFTER: float = 1
+MAX_RETRY_AFTER: float = 30
+RESULT_STREAM_CHUNK_SIZE: int = 1024 * 1024
+# the result sent over result channel is written by single thread, readers don't wait for it forever
+RESULT_PERSIST_TIMEOUT: float = 60
+mapped_files: MappedFilePool = MappedFilePool()
+result_channel: ResultChannel = ResultChannel()
+notebook_validator: NotebookValidator = NotebookValidator()
+run_history: RunHistory = RunHistory()
+validate_notebooks: bool = True
+image_store: ImageStore = ImageStore(results_images_dir)
 
 configure_logging()
 CustomEngine.create_logger()
 CustomPythonTranslator.create_logger()
 logger: logging.Logger = logging.getLogger('j-sp')
+# repeated per-request messages of polling end-points are rate limited
+polling_logger: logging.Logger = logging.getLogger('j-sp.polling')
+polling_log_filter: RateLimitFilter = RateLimitFilter()
+polling_logger.addFilter(polling_log_filter)
 
 
 class TaskStatus(Enum):
@@ -78,22 +121,135 @@ class TaskMetadata:
     task: Task[None]
     status: TaskStatus
     result: Any
+    error: Optional[Tuple[str, Dict[str, Any]]] = None
     customization: str = ''
+    table: str = ''
+    user_id: str = None
+    notebook: str = None
+    created_time: datetime
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
     job: Coroutine[Any, Any, Job[None]] = None
 
-    def __init__(self, task_id: str, result: Any = '', customization: str = '',
-                 job: Coroutine[Any, Any, Job[None]] = None):
+    def __init__(self, task_id: str, result: Any = '', customization: str = '', table: str = '', user_id: str = None,
+                 notebook: str = None, job: Coroutine[Any, Any, Job[None]] = None):
         self.task_id = task_id
+        # batch item gets the task when a worker of the batch starts it
+        self.task = None
         self.status = TaskStatus.CREATED
         self.result = result
         self.customization = customization
+        self.table = table
+        self.user_id = user_id
+        self.notebook = notebook
+        self.created_time = datetime.now(timezone.utc)
         self.job = job
+        self._changed = asyncio.Event()
+
+    def set_status(self, status: TaskStatus):
+        self.status = status
+        if status == TaskStatus.IN_PROGRESS:
+            self.start_time = datetime.now(timezone.utc)
+        elif status in (TaskStatus.SUCCESS, TaskStatus.FAILED):
+            self.end_time = datetime.now(timezone.utc)
+        # waiters of the previous status are woken up, next waiters wait for the next change
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def set_error(self, error: BaseException):
+        """Renders the error once and marks the task as failed, the error and its traceback frames aren't kept"""
+        self.error = prepare_response_error(error)
+        self.result = None
+        self.set_status(TaskStatus.FAILED)
+
+    async def wait_for_change(self):
+        await self._changed.wait()
+
+    def is_done(self) -> bool:
+        return self.status in (TaskStatus.SUCCESS, TaskStatus.FAILED)
+
+    async def wait_for_done(self, timeout: float):
+        """Waits until the task is finished or the timeout is expired"""
+        deadline = asyncio.get_running_loop().time() + timeout
+        while not self.is_done():
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(self.wait_for_change(), remaining)
+            except asyncio.TimeoutError:
+                return
+
+    def get_retry_after(self) -> float:
+        """Suggests when to poll the unfinished task again using durations of previous executions of the notebook"""
+        estimate = run_history.estimate(self.notebook) if self.notebook else None
+        if estimate is None:
+            return MIN_RETRY_AFTER
+        if self.start_time is not None:
+            estimate -= (datetime.now(timezone.utc) - self.start_time).total_seconds()
+        return min(max(estimate, MIN_RETRY_AFTER), MAX_RETRY_AFTER)
+
+    def get_estimated_end(self) -> Optional[datetime]:
+        """Estimates completion time of the running task by median duration of previous executions of the notebook"""
+        if self.status != TaskStatus.IN_PROGRESS or self.start_time is None or not self.notebook:
+            return None
+        estimate = run_history.estimate(self.notebook)
+        if estimate is None:
+            return None
+        return max(self.start_time + timedelta(seconds=estimate), datetime.now(timezone.utc))
+
+    def get_summary(self) -> dict:
+        """Returns status, timings and result sizes without reading result files"""
+        summary = {
+            'status': self.status.value,
+            'created': self.created_time.isoformat(),
+            'started': self.start_time.isoformat() if self.start_time else None,
+            'finished': self.end_time.isoformat() if self.end_time else None,
+        }
+        if self.start_time:
+            summary['duration_sec'] = ((self.end_time or datetime.now(timezone.utc)) - self.start_time).total_seconds()
+        estimated_end = self.get_estimated_end()
+        if estimated_end is not None:
+            summary['estimated_end'] = estimated_end.isoformat()
+        if self.status == TaskStatus.SUCCESS:
+            for key, path in (('result_size', self.result), ('customization_size', self.customization),
+                              ('table_size', self.table)):
+                size = get_result_size(path)
+                if size is not None:
+                    summary[key] = size
+        return summary
 
     def close_job(self) -> None:
         if self.job is not None:
             self.job.close()
 
 
+class BatchMetadata:
+    batch_id: str
+    task_ids: list[str]
+    task: Task[None] = None
+    merge: bool
+    output_path: str = None
+
+    def __init__(self, batch_id: str, task_ids: list[str], merge: bool = False):
+        self.batch_id = batch_id
+        self.task_ids = task_ids
+        self.merge = merge
+
+    def is_done(self) -> bool:
+        return self.task is not None and self.task.done()
+
+
+def get_result_size(path: str) -> Optional[int]:
+    """Returns size of the result file or the result sent over result channel"""
+    buffer = result_channel.get(path) if path else None
+    if buffer is not None:
+        return buffer.size
+    if path and os.path.isfile(path):
+        return os.path.getsize(path)
+    return None
+
+
 def create_dir(path: str):
     if not os.path.exists(path):
         os.makedirs(path)
@@ -105,8 +261,15 @@ def read_config(path: str):
     global results_dir
     global log_dir
     global cleanup_horizon
+    global results_quota
+    global results_images_quota
+    global logs_quota
     global venv_dir
     global kernel_name
+    global cell_execution_timeout
+    global max_batch_parallelism
+    global image_store
+    global validate_notebooks
     global logger
     try:
         file = open(path, "r")
@@ -126,6 +289,7 @@ def read_config(path: str):
         logger.info('results_images_dir=%s', results_images_dir)
         if results_images_dir:
             create_dir(results_images_dir)
+        image_store = ImageStore(results_images_dir)
 
         log_dir = os.path.abspath(cfg.get('logs', log_dir))
         logger.info('log_dir=%s', log_dir)
@@ -134,6 +298,25 @@ def read_config(path: str):
 
         cleanup_horizon = timedelta(days=cfg.get('cleanup-horizon-days', 14))
         logger.info('cleanup_horizon=%s', cleanup_horizon)
+        results_quota = cfg.get('results-quota', results_quota)
+        logger.info('results-quota=%s', results_quota)
+        results_images_quota = cfg.get('results-images-quota', results_images_quota)
+        logger.info('results-images-quota=%s', results_images_quota)
+        logs_quota = cfg.get('logs-quota', logs_quota)
+        logger.info('logs-quota=%s', logs_quota)
+        cleanup_workers = cfg.get('cleanup-workers', cleanup_engine.workers)
+        logger.info('cleanup-workers=%s', cleanup_workers)
+        cleanup_rate_limit = cfg.get('cleanup-rate-limit', cleanup_engine.rate_limit)
+        logger.info('cleanup-rate-limit=%s', cleanup_rate_limit)
+        cleanup_dry_run = cfg.get('cleanup-dry-run', cleanup_engine.dry_run)
+        logger.info('cleanup-dry-run=%s', cleanup_dry_run)
+        cleanup_engine.configure(cleanup_workers, cleanup_rate_limit, cleanup_dry_run)
+        user_quota = cfg.get('user-quota', disk_quota.user_quota)
+        logger.info('user-quota=%s', user_quota)
+        quota_policy = cfg.get('quota-policy', disk_quota.policy)
+        logger.info('quota-policy=%s', quota_policy)
+        disk_quota.configure({results_dir: results_quota, results_images_dir: results_images_quota,
+                              log_dir: logs_quota}, user_quota, quota_policy)
 
         restart_kernel_on_error = cfg.get('restart-kernel-on-error', CustomEngine.restart_kernel_on_error)
         logger.info('restart-kernel-on-error=%s', restart_kernel_on_error)
@@ -146,16 +329,173 @@ def read_config(path: str):
         kernel_name = cfg.get('python-kernel-name', kernel_name)
         logger.info('python-kernel-name=%s', kernel_name)
 
+        cell_execution_timeout = cfg.get('cell-execution-timeout', cell_execution_timeout)
+        logger.info('cell-execution-timeout=%s', cell_execution_timeout)
+        notebook_execution_timeout = cfg.get('notebook-execution-timeout', -1)
+        logger.info('notebook-execution-timeout=%s', notebook_execution_timeout)
+        kernel_interrupt_timeout = cfg.get('kernel-interrupt-timeout', CustomEngine.kernel_interrupt_timeout)
+        logger.info('kernel-interrupt-timeout=%s', kernel_interrupt_timeout)
+        incremental_execution = cfg.get('incremental-execution', CustomEngine.incremental_execution)
+        logger.info('incremental-execution=%s', incremental_execution)
+        kernel_reset_namespace = cfg.get('kernel-reset-namespace', CustomEngine.reset_kernel_namespace)
+        logger.info('kernel-reset-namespace=%s', kernel_reset_namespace)
+        kernel_preserved_names = cfg.get('kernel-preserved-names', CustomEngine.preserved_kernel_names)
+        logger.info('kernel-preserved-names=%s', kernel_preserved_names)
+        kernel_memory_limit = cfg.get('kernel-memory-limit', CustomEngine.kernel_memory_limit)
+        logger.info('kernel-memory-limit=%s', kernel_memory_limit)
+        kernel_health_check_interval = cfg.get('kernel-health-check-interval',
+                                               CustomEngine.kernel_health_check_interval)
+        logger.info('kernel-health-check-interval=%s', kernel_health_check_interval)
+        kernel_health_check_timeout = cfg.get('kernel-health-check-timeout', CustomEngine.kernel_health_check_timeout)
+        logger.info('kernel-health-check-timeout=%s', kernel_health_check_timeout)
+        kernel_pool_size = cfg.get('kernel-pool-size', 0)
+        logger.info('kernel-pool-size=%s', kernel_pool_size)
+        kernel_preload_modules = cfg.get('kernel-preload-modules', [])
+        logger.info('kernel-preload-modules=%s', kernel_preload_modules)
+
+        max_concurrent_executions = cfg.get('max-concurrent-executions', 8)
+        logger.info('max-concurrent-executions=%s', max_concurrent_executions)
+        max_concurrent_executions_per_user = cfg.get('max-concurrent-executions-per-user', 4)
+        logger.info('max-concurrent-executions-per-user=%s', max_concurrent_executions_per_user)
+
+        max_batch_parallelism = cfg.get('max-batch-parallelism', max_batch_parallelism)
+        logger.info('max-batch-parallelism=%s', max_batch_parallelism)
+
+        memory_budget = cfg.get('memory-budget', 0)
+        logger.info('memory-budget=%s', memory_budget)
+        run_history_size = cfg.get('run-history-size', run_history.max_runs)
+        logger.info('run-history-size=%s', run_history_size)
+        run_history.configure(run_history_size, os.path.join(log_dir, RUN_HISTORY_FILE_NAME) if log_dir else None)
+        run_history.load()
+
+        async_logging = cfg.get('async-logging', False)
+        logger.info('async-logging=%s', async_logging)
+        async_logging_queue_size = cfg.get('async-logging-queue-size', 10000)
+        logger.info('async-logging-queue-size=%s', async_logging_queue_size)
+        polling_log_rate = cfg.get('polling-log-rate', polling_log_filter.rate)
+        logger.info('polling-log-rate=%s', polling_log_rate)
+        polling_log_filter.set_rate(polling_log_rate)
+        if async_logging:
+            configure_async_logging(async_logging_queue_size)
+
+        mapped_files_pool_size = cfg.get('mapped-files-pool-size', 64)
+        logger.info('mapped-files-pool-size=%s', mapped_files_pool_size)
+        mapped_files.set_max_size(mapped_files_pool_size)
+
+        result_channel_max_size = cfg.get('result-channel-max-size', result_channel.max_size)
+        logger.info('result-channel-max-size=%s', result_channel_max_size)
+        result_channel.configure(results_dir, result_channel_max_size)
+
+        validate_notebooks = cfg.get('validate-notebooks', validate_notebooks)
+        logger.info('validate-notebooks=%s', validate_notebooks)
+
+        execution_scheduler.set_limits(max_concurrent_executions, max_concurrent_executions_per_user)
+        execution_scheduler.set_memory_budget(memory_budget)
         CustomEngine.set_restart_kernel_on_error(restart_kernel_on_error)
         CustomEngine.set_out_of_use_engine_time(out_of_use_engine_time)
+        CustomEngine.set_notebook_execution_timeout(notebook_execution_timeout)
+        CustomEngine.set_kernel_interrupt_timeout(kernel_interrupt_timeout)
+        CustomEngine.set_incremental_execution(incremental_execution)
+        CustomEngine.set_kernel_memory_hygiene(kernel_reset_namespace, kernel_preserved_names, kernel_memory_limit)
+        CustomEngine.set_kernel_health_check(kernel_health_check_interval, kernel_health_check_timeout)
+        CustomEngine.set_kernel_pool(kernel_pool_size, kernel_preload_modules)
+        CustomEngine.set_result_channel(result_channel)
     except Exception as e:
         logger.error("Read '%s' configuration failure", path, exc_info=e)
         raise e
+
+
+async def start_background_initialization(app: web.Application):
+    global kernel_registration
+    global venv_dir
+    global kernel_name
+    # server starts serving requests without waiting for the kernel registration, launch waits for it instead
+    kernel_registration = asyncio.create_task(asyncio.to_thread(
+        register_kernel, venv_dir=Path(venv_dir), kernel_name=kernel_name, kernel_display_name=kernel_name))
+    kernel_registration.add_done_callback(on_kernel_registration_done)
+
+    run_in_background(log_environment())
+    run_in_background(run_cleanup())
+    run_in_background(start_kernel_pool())
+    if CustomEngine.kernel_health_check_interval > 0:
+        run_in_background(CustomEngine.run_health_checks())
+    if validate_notebooks and os.path.isdir(notebooks_dir):
+        run_in_background(asyncio.to_thread(notebook_validator.scan, notebooks_dir))
+
+
+async def stop_background_tasks(app: web.Application):
+    await CustomEngine.kernel_pool.shutdown()
+
+
+def run_in_background(coro: Coroutine[Any, Any, Any]) -> Task:
+    global background_tasks
+    # event loop keeps weak references to tasks only
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+def on_kernel_registration_done(task: Task[None]):
+    global logger
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("register kernel failure", exc_info=task.exception())
+
+
+async def wait_for_kernel_registration():
+    global kernel_registration
+    if kernel_registration is not None:
+        # shield protects the registration from cancellation of the waiting launch
+        await asyncio.shield(kernel_registration)
+
+
+async def start_kernel_pool():
+    global kernel_name
+    global logger
+    if CustomEngine.kernel_pool.size <= 0:
+        return
+    try:
+        await wait_for_kernel_registration()
+    except Exception:
+        # the failure is logged by on_kernel_registration_done
+        return
+    logger.info('starting %d pooled kernels', CustomEngine.kernel_pool.size)
+    CustomEngine.kernel_pool.start(kernel_name)
+
+
+async def verify_notebook(absolute_path: str) -> Optional[Response]:
+    """Returns bad request response for invalid notebook, the verdict is cached until the notebook is changed"""
+    if not validate_notebooks:
+        return None
+    verdict = notebook_validator.get(absolute_path)
+    if verdict is None:
+        verdict = await asyncio.to_thread(notebook_validator.validate, absolute_path)
+    if not verdict.is_valid():
+        return web.HTTPBadRequest(reason=f"Notebook is invalid: {verdict}")
+    return None
+
+
+def verify_quota(user_id: str) -> Optional[Response]:
+    """Returns insufficient storage response when admission of executions is refused by exhausted quota"""
+    if disk_quota.policy != POLICY_REFUSE:
+        return None
+    reason = disk_quota.get_exceeded(user_id)
+    if reason is not None:
+        logger.warning("execution of '%s' user is refused: %s", user_id, reason)
+        return web.HTTPInsufficientStorage(reason=reason)
+    return None
+
+
+async def log_environment():
+    global logger
     try:
-        register_kernel(venv_dir=Path(venv_dir), kernel_name=kernel_name, kernel_display_name=kernel_name)
+        process = await asyncio.create_subprocess_exec(
+            sys.executable, '-m', 'pip', 'list',
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT)
+        stdout, _ = await process.communicate()
+        logger.info('installed packages:\n%s', stdout.decode(errors='replace'))
     except Exception as e:
-        logger.error("register kernel failure", exc_info=e)
-        raise e
+        logger.warning('list installed packages failure', exc_info=e)
 
 def get_or_default_engine_user_id(req: Request) -> str:
     return req.cookies.get(ENGINE_USER_ID_COOKIE_KEY, DEFAULT_ENGINE_USER_ID)
@@ -460,43 +800,329 @@ async def req_parameters(req: Request) -> Response:
     return web.json_response(params)
 
 
-async def launch_notebook(engine_user_id: str, input_path, arguments: dict, file_name, task_metadata: TaskMetadata):
+async def launch_notebook(engine_user_id: str, input_path, arguments: dict, file_name, task_metadata: TaskMetadata,
+                          nb_template=None):
     global logger
     global tasks
     global kernel_name
+    global cell_execution_timeout
     logger.info('launching notebook %s with %s', input_path, arguments)
 
     if task_metadata is None:
         return
 
-    task_metadata.status = TaskStatus.IN_PROGRESS
+    task_metadata.set_status(TaskStatus.IN_PROGRESS)
     start_execution = datetime.now()
     log_out: str = (log_dir + '/%s.log.ipynb' % file_name) if log_dir and file_name else None
     try:
+        await wait_for_kernel_registration()
+        if arguments.get('output_images_path'):
+            create_dir(arguments.get('output_images_path'))
         with chdir(input_path[:input_path.rfind('/')]):
             input_path = input_path[input_path.rfind('/') + 1:]
-            await epm.async_execute_notebook(
+            nb = await epm.async_execute_notebook(
                 engine_user_id=engine_user_id,
                 input_path=input_path,
                 output_path=log_out,
                 parameters=arguments,
                 kernel_name=kernel_name,
+                execution_timeout=cell_execution_timeout if cell_execution_timeout > 0 else None,
+                nb_template=nb_template,
             )
             logger.debug('successfully launched notebook %s', input_path)
-            task_metadata.status = TaskStatus.SUCCESS
             task_metadata.result = arguments.get('output_path')
             task_metadata.customization = arguments.get('customization_path')
+            task_metadata.table = arguments.get('output_table_path')
+            if task_metadata.notebook:
+                run_history.add(task_metadata.notebook, (datetime.now() - start_execution).total_seconds(),
+                                get_result_size(task_metadata.result),
+                                nb.metadata.get('j-sp', {}).get('kernel_peak_rss'))
+                run_in_background(asyncio.to_thread(run_history.save))
+            task_metadata.set_status(TaskStatus.SUCCESS)
     except EngineBusyError as error:
         logger.warning(error.args)
-        task_metadata.status = TaskStatus.FAILED
-        task_metadata.result = error
+        task_metadata.set_error(error)
+    except asyncio.CancelledError:
+        logger.info('launch notebook %s is cancelled', input_path)
+        task_metadata.set_error(RuntimeError('Notebook execution is stopped'))
+        raise
     except Exception as error:
         logger.error('failed to launch notebook %s', input_path, exc_info=error)
-        task_metadata.status = TaskStatus.FAILED
-        task_metadata.result = error
+        task_metadata.set_error(error)
     finally:
         spent_time = (datetime.now() - start_execution).total_seconds()
         logger.info('ended launch notebook %s with %s spent_time %d sec', input_path, arguments, spent_time)
+        if arguments.get('output_images_path'):
+            run_in_background(store_images(arguments.get('output_images_path')))
+        if disk_quota.is_enabled():
+            run_in_background(account_run_files(task_metadata.user_id, arguments, log_out))
+
+
+async def store_images(run_images_dir: str):
+    global logger
+    try:
+        deduplicated = await asyncio.to_thread(image_store.ingest, run_images_dir)
+        if deduplicated:
+            logger.info('%d images are linked to already stored content', deduplicated)
+    except Exception as error:
+        logger.warning('failed to store images', exc_info=error)
+
+
+async def account_run_files(user_id: str, arguments: dict, log_out: Optional[str]):
+    """Accounts output files of the finished execution and evicts the oldest files when a quota is near its limit"""
+    global logger
+    results = [path for path in (arguments.get('output_path'), arguments.get('customization_path'),
+                                 arguments.get('output_table_path')) if path]
+    paths = {results_dir: results, results_images_dir: [arguments.get('output_images_path')] if arguments.get(
+        'output_images_path') else [], log_dir: [log_out] if log_out else []}
+
+    def account():
+        for path in results:
+            # the result sent over result channel is accounted when it is written
+            try:
+                result_channel.wait_persisted(path, RESULT_PERSIST_TIMEOUT)
+            except TimeoutError:
+                logger.warning("'%s' result isn't written in %s sec, it's accounted partially", path,
+                               RESULT_PERSIST_TIMEOUT)
+        disk_quota.add(user_id, paths)
+        if disk_quota.policy == POLICY_EVICT and disk_quota.is_user_near_limit(user_id):
+            disk_quota.evict_user(user_id)
+
+    try:
+        await asyncio.to_thread(account)
+        if disk_quota.policy == POLICY_EVICT:
+            directories = disk_quota.get_near_limit_directories()
+            if directories:
+                logger.info('quota of %s is near its limit, the oldest files are evicted', ', '.join(directories))
+                await run_cleanup(LOW_WATERMARK)
+    except Exception as error:
+        logger.warning('failed to account files of execution', exc_info=error)
+
+
+async def schedule_notebook(engine_user_id: str, input_path, arguments: dict, file_name, task_metadata: TaskMetadata,
+                            priority: int = DEFAULT_PRIORITY):
+    global execution_scheduler
+    # task stays in the created status until its engine is free and the scheduler admits it
+    try:
+        async with CustomEngine.reserve_engine(engine_user_id, os.path.basename(input_path)):
+            async with execution_scheduler.slot(engine_user_id, priority, memory=estimate_memory(task_metadata)):
+                await launch_notebook(engine_user_id, input_path, arguments, file_name, task_metadata)
+    except asyncio.CancelledError:
+        fail_stopped_task(task_metadata)
+        raise
+
+
+def estimate_memory(task_metadata: TaskMetadata) -> int:
+    """Estimates memory used by the execution as the highest peak memory of kernel in previous executions"""
+    return (run_history.estimate_peak_rss(task_metadata.notebook) if task_metadata.notebook else None) or 0
+
+
+def fail_stopped_task(task_metadata: TaskMetadata):
+    if task_metadata.status == TaskStatus.CREATED:
+        task_metadata.set_error(RuntimeError('Notebook execution is stopped'))
+
+
+async def run_batch(user_id: str, input_path, items: list, batch: BatchMetadata, parallelism: int, priority: int):
+    global execution_scheduler
+    global logger
+    pending = list(reversed(items))
+    nb_template = None
+
+    async def work(worker_index: int):
+        # each worker uses own engine user id to reuse a separate kernel for its items
+        engine_user_id = f"{user_id}:batch:{batch.batch_id}:{worker_index}"
+        try:
+            while pending:
+                file_name, arguments, task_metadata = pending.pop()
+                if task_metadata.status != TaskStatus.CREATED:
+                    # the item is stopped by user before it is started
+                    continue
+                task_metadata.task = asyncio.create_task(
+                    schedule_batch_item(user_id, engine_user_id, input_path, arguments, file_name, task_metadata,
+                                        priority, nb_template))
+                try:
+                    await task_metadata.task
+                except asyncio.CancelledError:
+                    if asyncio.current_task().cancelling():
+                        raise
+                    # only the item is stopped by user, continue with the next one
+        finally:
+            CustomEngine.remove_user_engines(engine_user_id)
+
+    start_execution = datetime.now()
+    try:
+        # notebook is parsed once and copied for each parameter set
+        nb_template = await asyncio.to_thread(load_notebook_node, input_path)
+        await asyncio.gather(*(work(i) for i in range(min(parallelism, len(items)))))
+        if batch.merge:
+            await asyncio.to_thread(merge_batch_results, batch)
+    except asyncio.CancelledError:
+        for _, _, task_metadata in pending:
+            fail_stopped_task(task_metadata)
+        raise
+    except Exception as error:
+        logger.error('failed to run batch %s of %s notebook', batch.batch_id, input_path, exc_info=error)
+        for _, _, task_metadata in pending:
+            if task_metadata.status == TaskStatus.CREATED:
+                task_metadata.set_error(error)
+    finally:
+        spent_time = (datetime.now() - start_execution).total_seconds()
+        logger.info('ended batch %s of %s notebook with %d items spent_time %d sec', batch.batch_id, input_path,
+                    len(items), spent_time)
+
+
+async def schedule_batch_item(user_id: str, engine_user_id: str, input_path, arguments: dict, file_name,
+                              task_metadata: TaskMetadata, priority: int, nb_template):
+    global execution_scheduler
+    try:
+        async with CustomEngine.reserve_engine(engine_user_id, os.path.basename(input_path)):
+            async with execution_scheduler.slot(user_id, priority, memory=estimate_memory(task_metadata)):
+                await launch_notebook(engine_user_id, input_path, arguments, file_name, task_metadata, nb_template)
+    except asyncio.CancelledError:
+        fail_stopped_task(task_metadata)
+        raise
+
+
+def merge_batch_results(batch: BatchMetadata):
+    global tasks
+    global logger
+    with open(batch.output_path, 'wb') as output:
+        for task_id in batch.task_ids:
+            task: TaskMetadata = tasks.get(task_id)
+            if task is None or task.status != TaskStatus.SUCCESS:
+                continue
+            try:
+                result_channel.wait_persisted(task.result, RESULT_PERSIST_TIMEOUT)
+            except TimeoutError:
+                logger.warning("'%s' result isn't written in %s sec, it isn't merged into %s batch result",
+                               task.result, RESULT_PERSIST_TIMEOUT, batch.batch_id)
+                continue
+            if not os.path.isfile(task.result):
+                continue
+            with open(task.result, 'rb') as result:
+                shutil.copyfileobj(result, output)
+                # keep lines of neighbour results separated
+                if result.tell() > 0:
+                    result.seek(-1, os.SEEK_END)
+                    if result.read(1) != b'\n':
+                        output.write(b'\n')
+    logger.info('merged results of %s batch into %s', batch.batch_id, batch.output_path)
+
+
+def get_lines_range(req: Request) -> tuple[Optional[int], Optional[int]]:
+    offset = req.rel_url.query.get('offset')
+    limit = req.rel_url.query.get('limit')
+    return (int(offset) if offset is not None else None,
+            int(limit) if limit is not None else None)
+
+
+def read_file_content(path: str, offset: Optional[int] = None, limit: Optional[int] = None,
+                      final: bool = False) -> dict:
+    """
+    Reads the result sent by notebook over result channel or the file. Only final files are read via shared
+    memory map, other files can still be written, so they are read by plain reads.
+    Lines range is read when offset or limit is passed.
+    """
+    mapped_file = result_channel.get(path)
+    if mapped_file is None:
+        # the result which doesn't fit into memory is read after it is written
+        result_channel.wait_persisted(path, RESULT_PERSIST_TIMEOUT)
+        if not final:
+            if offset is None and limit is None:
+                return {'result': read_file_text(path)}
+            content, total_lines = read_file_lines(path, offset or 0, limit)
+            return {'result': content, 'offset': offset or 0, 'total_lines': total_lines}
+        mapped_file = mapped_files.get(path)
+    if offset is None and limit is None:
+        return {'result': mapped_file.read_text()}
+    return {'result': mapped_file.read_lines(offset or 0, limit), 'offset': offset or 0,
+            'total_lines': mapped_file.count_lines()}
+
+
+def open_result_chunks(path: str, offset: Optional[int] = None, limit: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Opens the result or its lines range and returns its chunks, the last line is terminated by new line.
+    The result file is read via shared memory map without reading the whole content.
+    Raises OSError when the result can't be opened.
+    """
+    buffer = result_channel.get(path)
+    if buffer is not None:
+        text = buffer.read_text() if offset is None and limit is None else buffer.read_lines(offset or 0, limit)
+        chunks = (text[start:start + RESULT_STREAM_CHUNK_SIZE].encode()
+                  for start in range(0, len(text), RESULT_STREAM_CHUNK_SIZE))
+    else:
+        # the result which doesn't fit into memory is read after it is written
+        result_channel.wait_persisted(path, RESULT_PERSIST_TIMEOUT)
+        mapped_file = mapped_files.get(path)
+        if offset is None and limit is None:
+            start, end = 0, mapped_file.size
+        else:
+            start, end = mapped_file.get_lines_bounds(offset or 0, limit)
+
+        def read_chunk(position: int) -> bytes:
+            with mapped_file.view(position, min(position + RESULT_STREAM_CHUNK_SIZE, end)) as view:
+                return bytes(view)
+
+        chunks = (read_chunk(position) for position in range(start, end, RESULT_STREAM_CHUNK_SIZE))
+    return terminate_last_line(chunks)
+
+
+def terminate_last_line(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    last_chunk = b''
+    for last_chunk in chunks:
+        yield last_chunk
+    if last_chunk and not last_chunk.endswith(b'\n'):
+        yield b'\n'
+
+
+async def stream_result(req: Request, task: TaskMetadata, offset: Optional[int], limit: Optional[int],
+                        etag: str) -> web.StreamResponse:
+    """
+    Streams NDJSON response: the first line is status of the task with customization, the next lines are
+    result records. Viewer starts rendering with the customization while the result is still arriving.
+    """
+    customization = "[]"
+    if task.customization and os.path.isfile(task.customization):
+        customization = await asyncio.to_thread(read_file_text, task.customization)
+    header = {'status': task.status.value, 'customization': customization, 'path': task.result}
+    if offset is not None or limit is not None:
+        header['offset'] = offset or 0
+    if task.table and os.path.isfile(task.table):
+        header['table'] = task.table
+    # the result is opened before the response is started, so the failure can still be reported by status
+    try:
+        chunks = await asyncio.to_thread(open_result_chunks, task.result, offset, limit)
+    except TimeoutError:
+        return web.HTTPServiceUnavailable(reason="Resulting file isn't written yet")
+    except OSError:
+        return web.HTTPNotFound(reason="Resulting file doesn't exist")
+    res = web.StreamResponse(headers={hdrs.CACHE_CONTROL: 'no-cache'})
+    res.content_type = 'application/x-ndjson'
+    res.etag = etag
+    await res.prepare(req)
+    await res.write(json.dumps(header).encode() + b'\n')
+    while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+        await res.write(chunk)
+    await res.write_eof()
+    return res
+
+
+def get_result_etag(task: TaskMetadata, offset: Optional[int], limit: Optional[int]) -> str:
+    """
+    Builds ETag of succeeded task response from the task id, size and modification time of result files
+    and requested lines range.
+    """
+    parts = [task.task_id, str(offset), str(limit)]
+    for path in (task.result, task.customization, task.table):
+        buffer = result_channel.get(path) if path else None
+        if buffer is not None:
+            parts.append(f'{buffer.size:x}-{buffer.created_time_ns:x}')
+        elif path and os.path.isfile(path):
+            stat = os.stat(path)
+            parts.append(f'{stat.st_size:x}-{stat.st_mtime_ns:x}')
+        else:
+            parts.append('-')
+    return hashlib.sha1('/'.join(parts).encode()).hexdigest()
 
 
 def verify_parameter(parameter):
@@ -514,11 +1140,24 @@ def verify_parameter(parameter):
         return parameter_value
 
 
-def cleanup_files():
+def prepare_parameters(req_json: dict, file_name: str) -> dict:
+    parameters = {}
+    for key, parameter in req_json.items():
+        parameters[key] = verify_parameter(parameter)
+    parameters['output_images_path'] = image_store.get_run_dir(file_name)
+    parameters['output_path'] = results_dir + '/%s.jsonl' % str(file_name)
+    parameters['customization_path'] = results_dir + '/%s.json' % str(file_name)
+    parameters['output_table_path'] = results_dir + '/%s.arrow' % str(file_name)
+    return parameters
+
+
+def cleanup_files(quota_ratio: float = 1):
+    """Removes expired files and the oldest files over quotas reduced by the ratio"""
     global logger
     global cleanup_horizon
 
-    if cleanup_horizon.total_seconds() < 0:
+    horizon = cleanup_horizon.total_seconds()
+    if horizon < 0 and not disk_quota.is_enabled():
         logger.debug('cleanup files skipped because horizon %s is negative', cleanup_horizon)
         return
 
@@ -527,36 +1166,42 @@ def cleanup_files():
         global results_dir
         global log_dir
 
-        horizon: datetime = datetime.now(timezone.utc) - cleanup_horizon
-
-        __cleanup_files_recursively(results_images_dir, horizon)
-        __cleanup_files_recursively(results_dir, horizon)
-        __cleanup_files_recursively(log_dir, horizon)
+        horizon_time = datetime.now(timezone.utc).timestamp() - horizon if horizon >= 0 else None
+        if disk_quota.policy == POLICY_REFUSE:
+            # files are kept, executions are refused when a quota is exhausted
+            quota_ratio = 0
+        reports = cleanup_engine.run([
+            CleanupTarget(results_images_dir, horizon_time, int(results_images_quota * quota_ratio)),
+            CleanupTarget(results_dir, horizon_time, int(results_quota * quota_ratio)),
+            CleanupTarget(log_dir, horizon_time, int(logs_quota * quota_ratio)),
+        ], protected=[run_history.path])
+        if not cleanup_engine.dry_run:
+            # the pass measures actual usage, the quota tracks changes until the next pass
+            for report in reports:
+                disk_quota.set_usage(report.directory,
+                                     report.scanned_bytes - report.expired_bytes - report.evicted_bytes)
+            disk_quota.reconcile()
     except Exception as e:
         logger.error('cleanup files failure', exc_info=e)
 
-def __cleanup_files_recursively(directory: str, horizon: datetime):
-    global logger
 
-    dir_path = Path(directory).absolute()
-    if not dir_path.exists() or not dir_path.is_dir():
-        logger.warning('%s is not a valid directory for cleanup files', directory)
-        return
-
-    for root, dirs, files in os.walk(dir_path, topdown=False):
-        root_path: Path = Path(root).absolute()
-        for file_name in files:
-            file_path: Path = root_path / file_name
-            modify_time = datetime.fromtimestamp(file_path.stat().st_mtime, tz=timezone.utc)
-            if modify_time < horizon:
-                file_path.unlink(missing_ok=True)
-                logger.info('%s file removed, horizon: %s, last modified: %s', file_path, horizon, modify_time)
+async def run_cleanup(quota_ratio: float = 1):
+    """
+    Starts cleanup pass in background unless a pass is in progress.
+    Execution waits for the pass when all files should be removed before each execution.
+    """
+    global cleanup_task
+    if cleanup_task is None or cleanup_task.done():
+        cleanup_task = run_in_background(asyncio.to_thread(cleanup_files, quota_ratio))
+    if cleanup_horizon.total_seconds() == 0:
+        await asyncio.shield(cleanup_task)
 
 
 async def req_launch(req: Request) -> Response:
     """
     ---
-    description: This end-point allows to start notebook. Query requires path to notebook.
+    description: This end-point allows to start notebook. Query requires path to notebook
+      and accepts optional integer priority, executions with higher priority are started first (default 0).
       Body required to be dictionary of parameters.
     tags:
     - Execution operation
@@ -566,17 +1211,19 @@ async def req_launch(req: Request) -> Response:
         "200":
             description: successful operation. Return json with path for resulting file.
         "400":
-            description: failed operation. body with parameters not present.
+            description: failed operation. body with parameters not present or notebook is invalid.
         "404":
             description: failed operation. requested file doesn't exist or requested path didn't start with ./notebooks.
         "500":
             description: failed operation. directory for output doesn't exist.
+        "507":
+            description: failed operation. quota of output directory or user is exhausted.
     """
     global tasks
     global logger
     path_arg = req.rel_url.query.get('path', '')
     logger.info('/execute?path=%s', path_arg)
-    cleanup_files()
+    await run_cleanup()
     if not req.can_read_body:
         return web.HTTPBadRequest(reason='Body with parameters not present')
     try:
@@ -586,6 +1233,16 @@ async def req_launch(req: Request) -> Response:
         return web.HTTPNotFound(reason=f"Requested {path_arg} path didn't start with {notebooks_dir}")
     if not path_arg or not os.path.isfile(absolute_path):
         return web.HTTPNotFound()
+    invalid_response = await verify_notebook(absolute_path)
+    if invalid_response is not None:
+        return invalid_response
+    quota_response = verify_quota(get_or_default_engine_user_id(req))
+    if quota_response is not None:
+        return quota_response
+    try:
+        priority = int(req.rel_url.query.get('priority', DEFAULT_PRIORITY))
+    except ValueError:
+        return web.HTTPBadRequest(reason='Priority should be integer')
     if not os.path.exists(results_dir):
         return web.HTTPInternalServerError(reason='No output directory')
     if not os.path.exists(results_images_dir):
@@ -593,32 +1250,109 @@ async def req_launch(req: Request) -> Response:
     notebook_name = absolute_path.split('/')[-1].split('.')[0]
     timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H-%M-%S-%f")
     file_name = notebook_name + '_' + timestamp
-    output_path = results_dir + '/%s.jsonl' % str(file_name)
-    customization_path = results_dir + '/%s.json' % str(file_name)
     req_json = await req.json()
     user_id = get_or_default_engine_user_id(req)
-    parameters = {}
-    for key, parameter in req_json.items():
-        try:
-            parameters[key] = verify_parameter(parameter)
-        except Exception as error:
-            return web.HTTPInternalServerError(reason=str(error))
-    parameters['output_images_path'] = results_images_dir
-    parameters['output_path'] = output_path
-    parameters['customization_path'] = customization_path
+    try:
+        parameters = prepare_parameters(req_json, file_name)
+    except Exception as error:
+        return web.HTTPInternalServerError(reason=str(error))
     task_id = str(uuid4())
-    task_metadata = TaskMetadata(task_id=task_id)
+    task_metadata = TaskMetadata(task_id=task_id, user_id=user_id, notebook=absolute_path)
     tasks[task_id] = task_metadata
     task: Task[None] = asyncio.create_task(
-        launch_notebook(user_id, absolute_path, parameters, file_name, task_metadata))
+        schedule_notebook(user_id, absolute_path, parameters, file_name, task_metadata, priority))
     task_metadata.task = task
     return web.json_response({'task_id': task_id})
 
 
+async def req_launch_batch(req: Request) -> Response:
+    """
+    ---
+    description: This end-point allows to start notebook for each set of parameters. Query requires path to notebook
+      and accepts optional parallelism - number of kernels used for the batch, optional merge - if true results
+      are merged into one JSONL file, optional integer priority (default -1).
+      Body required to be list of dictionaries of parameters.
+    tags:
+    - Execution operation
+    produces:
+    - application/json
+    responses:
+        "200":
+            description: successful operation. Return json with batch id and task ids for each set of parameters.
+        "400":
+            description: failed operation. body with list of parameters not present or notebook is invalid.
+        "404":
+            description: failed operation. requested file doesn't exist or requested path didn't start with ./notebooks.
+        "500":
+            description: failed operation. directory for output doesn't exist.
+        "507":
+            description: failed operation. quota of output directory or user is exhausted.
+    """
+    global tasks
+    global batches
+    global max_batch_parallelism
+    global logger
+    path_arg = req.rel_url.query.get('path', '')
+    logger.info('/execute/batch?path=%s', path_arg)
+    await run_cleanup()
+    if not req.can_read_body:
+        return web.HTTPBadRequest(reason='Body with list of parameters not present')
+    try:
+        absolute_path = verify_path(path_arg, {notebooks_dir})
+    except Exception as error:
+        logger.warning("Requested %s path didn't start with %s", path_arg, notebooks_dir, exc_info=error)
+        return web.HTTPNotFound(reason=f"Requested {path_arg} path didn't start with {notebooks_dir}")
+    if not path_arg or not os.path.isfile(absolute_path):
+        return web.HTTPNotFound()
+    invalid_response = await verify_notebook(absolute_path)
+    if invalid_response is not None:
+        return invalid_response
+    quota_response = verify_quota(get_or_default_engine_user_id(req))
+    if quota_response is not None:
+        return quota_response
+    try:
+        priority = int(req.rel_url.query.get('priority', DEFAULT_PRIORITY - 1))
+        parallelism = int(req.rel_url.query.get('parallelism', max_batch_parallelism))
+    except ValueError:
+        return web.HTTPBadRequest(reason='Priority and parallelism should be integer')
+    if max_batch_parallelism > 0:
+        parallelism = min(parallelism, max_batch_parallelism)
+    parallelism = max(parallelism, 1)
+    merge = req.rel_url.query.get('merge', 'false').lower() == 'true'
+    if not os.path.exists(results_dir):
+        return web.HTTPInternalServerError(reason='No output directory')
+    if not os.path.exists(results_images_dir):
+        return web.HTTPInternalServerError(reason='No output images directory')
+    req_json = await req.json()
+    if not isinstance(req_json, list) or len(req_json) == 0:
+        return web.HTTPBadRequest(reason='Body should be non-empty list of parameters')
+    notebook_name = absolute_path.split('/')[-1].split('.')[0]
+    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H-%M-%S-%f")
+    user_id = get_or_default_engine_user_id(req)
+    items = []
+    for index, parameters_json in enumerate(req_json):
+        file_name = notebook_name + '_' + timestamp + '_' + str(index)
+        try:
+            parameters = prepare_parameters(parameters_json, file_name)
+        except Exception as error:
+            return web.HTTPInternalServerError(reason=str(error))
+        items.append((file_name, parameters, TaskMetadata(task_id=str(uuid4()), user_id=user_id, notebook=absolute_path)))
+
+    batch = BatchMetadata(batch_id=str(uuid4()), task_ids=[item[2].task_id for item in items], merge=merge)
+    if merge:
+        batch.output_path = results_dir + '/%s.jsonl' % (notebook_name + '_' + timestamp + '_batch')
+    for _, _, task_metadata in items:
+        tasks[task_metadata.task_id] = task_metadata
+    batches[batch.batch_id] = batch
+    batch.task = asyncio.create_task(run_batch(user_id, absolute_path, items, batch, parallelism, priority))
+    return web.json_response({'batch_id': batch.batch_id, 'task_ids': batch.task_ids})
+
+
 async def req_file(req: Request) -> Response:
     """
     ---
-    description: This end-point allows to get file from requested path. Query requires path to file.
+    description: This end-point allows to get file from requested path. Query requires path to file,
+      accepts optional offset and limit of lines to get lines range of the file.
     tags:
     - File operation
     produces:
@@ -626,6 +1360,8 @@ async def req_file(req: Request) -> Response:
     responses:
         "200":
             description: successful operation. Return file's json.
+        "400":
+            description: failed operation. offset or limit isn't integer.
         "404":
             description: failed operation. requested file doesn't exist
               or requested path didn't start with ./results or ./notebooks.
@@ -634,14 +1370,15 @@ async def req_file(req: Request) -> Response:
     global logger
     path_arg = req.rel_url.query.get('path', '')
     logger.info('/file?path=%s', path_arg)
+    try:
+        offset, limit = get_lines_range(req)
+    except ValueError:
+        return web.HTTPBadRequest(reason='Offset and limit should be integer')
     try:
         absolute_path = verify_path(path_arg, {results_dir, notebooks_dir})
         if not path_arg or not os.path.isfile(absolute_path):
             return web.HTTPNotFound()
-        file = open(absolute_path, "r")
-        content = file.read()
-        file.close()
-        return web.json_response({'result': content})
+        return web.json_response(await asyncio.to_thread(read_file_content, absolute_path, offset, limit))
     except ValueError as error:
         logger.warning("Requested %s path didn't start with %s or %s", path_arg, results_dir, notebooks_dir, exc_info=error)
         return web.HTTPNotFound(reason=f"Requested {path_arg} path didn't start with {results_dir} or {notebooks_dir}")
@@ -650,10 +1387,11 @@ async def req_file(req: Request) -> Response:
         return web.HTTPInternalServerError(reason=str(error))
 
 
-async def req_image(req: Request) -> Union[HTTPInternalServerError, FileResponse, HTTPNotFound]:
+async def req_image(req: Request) -> Union[HTTPInternalServerError, Response, HTTPNotFound]:
     """
     ---
     description: This end-point allows to get image from requested path. Query requires path to image.
+      Response has strong ETag computed from image content, images stored by content are immutable.
     tags:
     - File operation
     produces:
@@ -661,6 +1399,8 @@ async def req_image(req: Request) -> Union[HTTPInternalServerError, FileResponse
     responses:
         "200":
             description: successful operation. Return image content.
+        "304":
+            description: successful operation. Image content matches If-None-Match header.
         "404":
             description: failed operation. requested image doesn't exist
               or requested path didn't start with ./results/images.
@@ -673,7 +1413,21 @@ async def req_image(req: Request) -> Union[HTTPInternalServerError, FileResponse
         absolute_path = verify_path(path_arg, {results_images_dir})
         if not path_arg or not os.path.isfile(absolute_path):
             return web.HTTPNotFound()
-        return web.FileResponse(absolute_path)
+        stat = os.stat(absolute_path)
+        stored = image_store.is_stored(stat)
+        etag = await asyncio.to_thread(image_store.get_hash, absolute_path, stat)
+        headers = {hdrs.CACHE_CONTROL: 'public, max-age=31536000, immutable' if stored else 'no-cache'}
+        if req.if_none_match is not None and any(tag.value in (etag, ETAG_ANY) for tag in req.if_none_match):
+            return web.HTTPNotModified(headers={hdrs.ETAG: f'"{etag}"', **headers})
+        # only stored image can't be changed, so it's safe to map it
+        if stored:
+            body = (await asyncio.to_thread(mapped_files.get, absolute_path)).view()
+        else:
+            body = await asyncio.to_thread(Path(absolute_path).read_bytes)
+        res = web.Response(body=body, headers=headers,
+                           content_type=mimetypes.guess_type(absolute_path)[0] or 'application/octet-stream')
+        res.etag = etag
+        return res
     except ValueError as error:
         logger.warning("Requested %s path didn't start with %s", path_arg, results_images_dir, exc_info=error)
         return web.HTTPNotFound(reason=f"Requested {path_arg} path didn't start with {results_images_dir}")
@@ -686,64 +1440,176 @@ async def req_result(req: Request) -> Response:
     """
     ---
     description: This end-point allows to get result from requested task.
-      Query requires task id from which result is required.
+      Query requires task id from which result is required,
+      accepts optional offset and limit of lines to get lines range of the result
+      and optional status_only - if true only task status is returned and result files aren't read.
+      Query accepts optional wait - number of seconds to wait until the task is finished (long polling, max 60).
+      Response of unfinished task has Retry-After header and retry_after field - number of seconds
+      to the next poll estimated by durations of previous executions of the notebook,
+      response of running task has estimated_end field when the notebook has been executed before.
+      Response of succeeded task has ETag, If-None-Match header is supported.
+      Query accepts optional format - json (default) or ndjson. Succeeded task is streamed in ndjson format:
+      the first line is json with status, customization and path, the next lines are result records.
     tags:
     - Execution operation
     produces:
     - application/json
+    - application/x-ndjson
     responses:
         "200":
             description: successful operation. Return different data depending on status:
+                'created': return json with task's status, task is waiting for execution
                 'in progress': return json with task's status
                 'success': return json with result's content
                 'error': return json with reason of failed run
+        "304":
+            description: successful operation. Result isn't changed since response with ETag from If-None-Match.
         "400":
-            description: failed operation. body with parameters not present.
+            description: failed operation. body with parameters not present or offset or limit isn't integer
+              or wait isn't number.
         "404":
             description: failed operation. requested task doesn't exist
               or resulting file doesn't exist or status is unknown.
+        "503":
+            description: failed operation. resulting file sent over result channel isn't written in time.
     """
     global tasks
     global logger
     task_id = req.rel_url.query.get('id')
-    logger.debug('/result?id=%s', task_id)
+    polling_logger.debug('/result?id=%s', task_id)
     task: TaskMetadata = tasks.get(task_id)
     if task is None:
         return web.HTTPNotFound(reason="Requested task doesn't exist")
+    try:
+        offset, limit = get_lines_range(req)
+    except ValueError:
+        return web.HTTPBadRequest(reason='Offset and limit should be integer')
+    try:
+        wait = min(float(req.rel_url.query.get('wait', 0)), MAX_LONG_POLL_TIME)
+    except ValueError:
+        return web.HTTPBadRequest(reason='Wait should be number')
+    if wait > 0:
+        await task.wait_for_done(wait)
     status = task.status
     start = datetime.now()
     try:
-        if status == TaskStatus.IN_PROGRESS:
+        if status == TaskStatus.CREATED or status == TaskStatus.IN_PROGRESS:
+            retry_after = task.get_retry_after()
+            response = {'status': status.value, 'retry_after': round(retry_after, 3)}
+            estimated_end = task.get_estimated_end()
+            if estimated_end is not None:
+                response['estimated_end'] = estimated_end.isoformat()
+            return web.json_response(response, headers={hdrs.RETRY_AFTER: str(math.ceil(retry_after))})
+        elif req.rel_url.query.get('status_only', 'false').lower() == 'true':
             return web.json_response({'status': status.value})
         elif status == TaskStatus.SUCCESS:
             path_param = task.result
-            if not path_param or not os.path.isfile(path_param):
+            if not path_param or not (result_channel.contains(path_param) or os.path.isfile(path_param)):
                 return web.HTTPNotFound(reason="Resulting file doesn't exist")
+            etag = get_result_etag(task, offset, limit)
+            if req.if_none_match is not None and any(tag.value in (etag, ETAG_ANY) for tag in req.if_none_match):
+                return web.HTTPNotModified(headers={hdrs.ETAG: f'"{etag}"', hdrs.CACHE_CONTROL: 'no-cache'})
+            if req.rel_url.query.get('format', 'json') == 'ndjson':
+                return await stream_result(req, task, offset, limit, etag)
             customization_param = task.customization
             customization = "[]"
             if len(customization_param) > 0 and os.path.isfile(customization_param):
-                customization_file = open(customization_param, "r")
-                customization = customization_file.read()
-                customization_file.close()
-            file = open(path_param, "r")
-            content = file.read()
-            file.close()
-            return web.json_response(
-                {'status': status.value, 'result': content, 'customization': customization, 'path': path_param})
+                customization = await asyncio.to_thread(read_file_text, customization_param)
+            try:
+                content = await asyncio.to_thread(read_file_content, path_param, offset, limit, True)
+            except TimeoutError:
+                return web.HTTPServiceUnavailable(reason="Resulting file isn't written yet")
+            except OSError:
+                return web.HTTPNotFound(reason="Resulting file doesn't exist")
+            response = {'status': status.value, **content, 'customization': customization, 'path': path_param}
+            if task.table and os.path.isfile(task.table):
+                response['table'] = task.table
+            res = web.json_response(response, headers={hdrs.CACHE_CONTROL: 'no-cache'})
+            res.etag = etag
+            return res
         elif status == TaskStatus.FAILED:
-            short_error, detailed_error = prepare_response_error(task.result)
+            short_error, detailed_error = task.error
             return web.json_response({'status': status.value, 'result': short_error, 'details': detailed_error})
         else:
             return web.HTTPNotFound()
     finally:
-        if logger.isEnabledFor(DEBUG):
-            logger.debug(f"/result?id={task_id}, status: {status}, duration: {datetime.now() - start}")
+        if polling_logger.isEnabledFor(DEBUG):
+            polling_logger.debug("/result?id=%s, status: %s, duration: %s", task_id, status, datetime.now() - start)
+
+
+async def req_result_table(req: Request) -> Union[Response, web.StreamResponse]:
+    """
+    ---
+    description: This end-point allows to get rows range of table written by notebook in Arrow IPC or Parquet format
+      into file passed by output_table_path parameter. Query requires task id or path to table file, accepts
+      optional offset (default 0), limit (default all rows), comma separated columns (default all columns)
+      and format - arrow (default) or json.
+    tags:
+    - Execution operation
+    produces:
+    - application/vnd.apache.arrow.stream
+    - application/json
+    responses:
+        "200":
+            description: successful operation. Return Arrow IPC stream or json with columns and rows.
+        "400":
+            description: failed operation. query parameters are invalid.
+        "404":
+            description: failed operation. requested task or table file doesn't exist
+              or requested path didn't start with ./results.
+    """
+    global tasks
+    global logger
+    task_id = req.rel_url.query.get('id')
+    path_arg = req.rel_url.query.get('path', '')
+    polling_logger.debug('/result/table?id=%s&path=%s', task_id, path_arg)
+    if task_id is not None:
+        task: TaskMetadata = tasks.get(task_id)
+        if task is None or task.status != TaskStatus.SUCCESS:
+            return web.HTTPNotFound(reason="Requested task doesn't exist or isn't succeeded")
+        table_path = task.table
+    else:
+        try:
+            table_path = verify_path(path_arg, {results_dir})
+        except ValueError as error:
+            logger.warning("Requested %s path didn't start with %s", path_arg, results_dir, exc_info=error)
+            return web.HTTPNotFound(reason=f"Requested {path_arg} path didn't start with {results_dir}")
+    if not table_path or not os.path.isfile(table_path):
+        return web.HTTPNotFound(reason="Table file doesn't exist")
+
+    try:
+        offset = int(req.rel_url.query.get('offset', 0))
+        limit = req.rel_url.query.get('limit')
+        limit = int(limit) if limit is not None else None
+    except ValueError:
+        return web.HTTPBadRequest(reason='Offset and limit should be integer')
+    columns_arg = req.rel_url.query.get('columns')
+    columns = columns_arg.split(',') if columns_arg else None
+    try:
+        table = await asyncio.to_thread(TableSlice, table_path, offset, limit, columns)
+    except ValueError as error:
+        return web.HTTPBadRequest(reason=str(error))
+
+    try:
+        if req.rel_url.query.get('format', 'arrow') == 'json':
+            return web.json_response(await asyncio.to_thread(table.to_pylist))
+        res = web.StreamResponse(headers={'X-Total-Rows': str(table.total_rows)})
+        res.content_type = 'application/vnd.apache.arrow.stream'
+        await res.prepare(req)
+        chunks = table.to_ipc_stream()
+        while (chunk := await asyncio.to_thread(next, chunks, None)) is not None:
+            await res.write(chunk)
+        await res.write_eof()
+        return res
+    finally:
+        table.close()
 
 
 async def req_stop(req: Request) -> Response:
     """
     ---
     description: This end-point allows to stop task. Query requires task id which will be stopped.
+      Kernel executing the task is interrupted and restarted if it doesn't respond.
     tags:
     - Execution operation
     produces:
@@ -751,6 +1617,8 @@ async def req_stop(req: Request) -> Response:
     responses:
         "200":
             description: successful operation. Return nothing.
+        "404":
+            description: failed operation. requested task doesn't exist.
         "500":
             description: failed operation. failed to stop process.
     """
@@ -758,9 +1626,14 @@ async def req_stop(req: Request) -> Response:
     global logger
     task_id = req.rel_url.query.get('id')
     logger.info('/stop?id=%s', task_id)
-    task: TaskMetadata = tasks.pop(task_id)
+    task: TaskMetadata = tasks.pop(task_id, None)
+    if task is None:
+        return web.HTTPNotFound(reason="Requested task doesn't exist")
     try:
-        if task and task.status == TaskStatus.IN_PROGRESS:
+        if task.task is None:
+            # batch item waiting for a worker is skipped by the worker
+            fail_stopped_task(task)
+        elif task.status in (TaskStatus.CREATED, TaskStatus.IN_PROGRESS):
             task.task.cancel("stopped by user")
     except Exception as error:
         logger.warning('failed to stop process', exc_info=error)
@@ -768,18 +1641,162 @@ async def req_stop(req: Request) -> Response:
     return web.HTTPOk()
 
 
+async def req_results_status(req: Request) -> Response:
+    """
+    ---
+    description: This end-point allows to get status, timings and result sizes of many tasks without reading results.
+      Body accepts list of task ids or dictionary of task id to status known by client,
+      GET request accepts comma separated task ids in ids query parameter.
+      All tasks of the calling engine_user_id are returned when task ids aren't passed.
+      Query accepts optional wait - number of seconds to wait until status of any task is changed (long polling),
+      the response is immediate if known status of any task differs from the current status.
+    tags:
+    - Execution operation
+    produces:
+    - application/json
+    responses:
+        "200":
+            description: successful operation. Return json with summary of each task,
+              'unknown' status is returned for task which doesn't exist.
+        "400":
+            description: failed operation. body or wait query parameter is invalid.
+    """
+    global tasks
+    global logger
+    try:
+        wait = min(float(req.rel_url.query.get('wait', 0)), MAX_LONG_POLL_TIME)
+    except ValueError:
+        return web.HTTPBadRequest(reason='Wait should be number')
+    known_statuses: dict = {}
+    if req.method == 'POST' and req.can_read_body:
+        try:
+            req_json = await req.json()
+        except ValueError:
+            return web.HTTPBadRequest(reason='Body should be list of task ids or dictionary of task id to status')
+        if isinstance(req_json, dict):
+            known_statuses = req_json
+        elif isinstance(req_json, list):
+            known_statuses = dict.fromkeys(req_json)
+        else:
+            return web.HTTPBadRequest(reason='Body should be list of task ids or dictionary of task id to status')
+    elif req.rel_url.query.get('ids'):
+        known_statuses = dict.fromkeys(req.rel_url.query.get('ids').split(','))
+    if known_statuses:
+        task_ids = list(known_statuses.keys())
+    else:
+        user_id = get_or_default_engine_user_id(req)
+        task_ids = [task_id for task_id, task in tasks.items() if task.user_id == user_id]
+    polling_logger.debug('/result/status?wait=%s for %d tasks', wait, len(task_ids))
+
+    def get_status(task_id: str) -> Optional[str]:
+        task: TaskMetadata = tasks.get(task_id)
+        return task.status.value if task is not None else None
+
+    if wait > 0:
+        current_statuses = {task_id: get_status(task_id) for task_id in task_ids}
+        if all(known_statuses.get(task_id) in (None, status) for task_id, status in current_statuses.items()):
+            waiters = [asyncio.ensure_future(tasks[task_id].wait_for_change()) for task_id in task_ids
+                       if task_id in tasks and tasks[task_id].status in (TaskStatus.CREATED, TaskStatus.IN_PROGRESS)]
+            if waiters:
+                try:
+                    await asyncio.wait(waiters, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                finally:
+                    for waiter in waiters:
+                        waiter.cancel()
+
+    summaries = {}
+    for task_id in task_ids:
+        task: TaskMetadata = tasks.get(task_id)
+        summaries[task_id] = task.get_summary() if task is not None else {'status': 'unknown'}
+    return web.json_response({'tasks': summaries})
+
+
+async def req_batch_result(req: Request) -> Response:
+    """
+    ---
+    description: This end-point allows to get progress of requested batch.
+      Query requires batch id from which progress is required.
+    tags:
+    - Execution operation
+    produces:
+    - application/json
+    responses:
+        "200":
+            description: successful operation. Return json with batch status, number of tasks in each status,
+              status of each task and path to merged result if it was requested.
+        "404":
+            description: failed operation. requested batch doesn't exist.
+    """
+    global tasks
+    global batches
+    global logger
+    batch_id = req.rel_url.query.get('id')
+    polling_logger.debug('/batch/result?id=%s', batch_id)
+    batch: BatchMetadata = batches.get(batch_id)
+    if batch is None:
+        return web.HTTPNotFound(reason="Requested batch doesn't exist")
+
+    task_statuses = {}
+    progress = {status.value: 0 for status in TaskStatus}
+    for task_id in batch.task_ids:
+        task: TaskMetadata = tasks.get(task_id)
+        status = task.status if task is not None else TaskStatus.FAILED
+        task_statuses[task_id] = status.value
+        progress[status.value] += 1
+
+    if not batch.is_done():
+        status = TaskStatus.IN_PROGRESS
+    elif progress[TaskStatus.SUCCESS.value] > 0 and (not batch.merge or os.path.isfile(batch.output_path)):
+        status = TaskStatus.SUCCESS
+    else:
+        status = TaskStatus.FAILED
+    response = {'status': status.value, 'total': len(batch.task_ids), 'progress': progress, 'tasks': task_statuses}
+    if batch.merge and status == TaskStatus.SUCCESS:
+        response['path'] = batch.output_path
+    return web.json_response(response)
+
+
+async def req_batch_stop(req: Request) -> Response:
+    """
+    ---
+    description: This end-point allows to stop all tasks of batch. Query requires batch id which will be stopped.
+    tags:
+    - Execution operation
+    produces:
+    - application/json
+    responses:
+        "200":
+            description: successful operation. Return nothing.
+        "404":
+            description: failed operation. requested batch doesn't exist.
+    """
+    global batches
+    global logger
+    batch_id = req.rel_url.query.get('id')
+    logger.info('/batch/stop?id=%s', batch_id)
+    batch: BatchMetadata = batches.get(batch_id)
+    if batch is None:
+        return web.HTTPNotFound(reason="Requested batch doesn't exist")
+    if not batch.is_done():
+        batch.task.cancel("stopped by user")
+    return web.HTTPOk()
+
+
 
 if __name__ == '__main__':
     parser = ArgumentParser()
     parser.add_argument('config')
-    cfg_path = vars(parser.parse_args()).get('config')
+    parser.add_argument('--port', type=int, default=8080)
+    args = vars(parser.parse_args())
+    cfg_path = args.get('config')
     if cfg_path:
         read_config(cfg_path)
 
-    cleanup_files()
     app = web.Application(middlewares=[add_engine_user_id_middleware])
 
     setup(app)
+    app.on_startup.append(start_background_initialization)
+    app.on_cleanup.append(stop_background_tasks)
     app.router.add_route('GET', "/status", req_status)
     app.router.add_route('GET', "/files/notebooks", req_notebooks)
     app.router.add_route('GET', "/files/results", req_jsons)
@@ -789,7 +1806,13 @@ if __name__ == '__main__':
     app.router.add_route('GET', "/image", req_image)
     app.router.add_route('POST', "/execute", req_launch)
     app.router.add_route('GET', "/result", req_result)
+    app.router.add_route('GET', "/result/table", req_result_table)
+    app.router.add_route('GET', "/result/status", req_results_status)
+    app.router.add_route('POST', "/result/status", req_results_status)
     app.router.add_route('POST', "/stop", req_stop)
+    app.router.add_route('POST', "/execute/batch", req_launch_batch)
+    app.router.add_route('GET', "/batch/result", req_batch_result)
+    app.router.add_route('POST', "/batch/stop", req_batch_stop)
     setup_swagger(app)
     logger.info('starting server')
-    web.run_app(app)
+    web.run_app(app, port=args.get('port'))